@@ -0,0 +1,149 @@
+"""Negotiated gzip/brotli response compression
+
+Picks the best encoding the client accepts (``br`` when the optional
+``brotli`` package is installed, otherwise ``gzip``) and compresses both
+plain and streaming responses once the first body chunk reaches
+``minimum_size``. Server-Sent Events and already-compressed media
+(xlsx is a zip archive) pass through untouched.
+"""
+import asyncio
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+EXCLUDED_MEDIA_TYPES = (
+    "text/event-stream",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/zip",
+    "application/gzip",
+    "image/",
+)
+
+# Bodies at least this large are compressed off the event loop
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding for an Accept-Encoding header, or None"""
+    encodings = _accepted_encodings(accept_encoding)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    wildcard = encodings.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = encodings.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._brotli.process(body)
+            return data + (self._brotli.flush() if more_body else self._brotli.finish())
+        data = self._gzip.compress(body)
+        return data + self._gzip.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or media_type.startswith(EXCLUDED_MEDIA_TYPES)
+                )
+                if encoding is None and not passthrough:
+                    # Uncompressed, but caches must still key on Accept-Encoding
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                    passthrough = True
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk decides the encoding
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if len(body) < self.minimum_size and not more_body:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+
+            if len(body) >= THREAD_MINIMUM_SIZE:
+                data = await asyncio.to_thread(compressor.compress, body, more_body)
+            else:
+                data = compressor.compress(body, more_body)
+
+            if start_message is not None:
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                start_message = None
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -7,6 +7,86 @@ class Settings(BaseSettings):
     firebase_credentials_path: str = "firebase_credentials.json"
     firebase_project_id: str = "kelly-education-lee-coun-a4aae"
     
+    # Firestore client tuning
+    firestore_query_timeout: float = 30.0
+    firestore_retry_initial: float = 0.5
+    firestore_retry_maximum: float = 8.0
+    firestore_retry_multiplier: float = 2.0
+    firestore_retry_deadline: float = 60.0
+    firestore_io_workers: int = 8
+    
+    # Result cache (TTL in seconds per cached metric)
+    cache_enabled: bool = True
+    cache_default_ttl: float = 30.0
+    cache_ttls: dict = {
+        "summary": 15.0,
+        "visits_overview": 15.0,
+        "visits_trend": 60.0,
+        "visit_types": 60.0,
+        "visits_range": 300.0,
+        "heatmap": 300.0,
+        "data_version": 5.0,
+        "collections": 300.0
+    }
+    cache_max_entries: int = 256
+    cache_max_bytes: int = 32 * 1024 * 1024
+    
+    # Live visit index (on_snapshot listeners; holds visit metadata in memory)
+    visit_index_enabled: bool = False
+    
+    # Local analytical mirror (SQLite file); empty path disables it
+    local_store_path: str = ""
+    local_store_sync_interval: float = 300.0
+    
+    # Real-time stats stream (seconds)
+    stream_interval: float = 5.0
+    stream_heartbeat_interval: float = 15.0
+    stream_client_queue_size: int = 2
+    
+    # Custom date-range analytics
+    custom_range_max_days: int = 400
+    
+    # Pagination (JSON reports/exports)
+    page_size_default: int = 500
+    page_size_max: int = 5000
+    
+    # Exports
+    export_page_size: int = 1000
+    export_spool_max_bytes: int = 8 * 1024 * 1024
+    
+    # Report jobs (xlsx/pdf rendered in worker processes)
+    report_workers: int = 2
+    report_artifact_dir: str = ""  # each process renders into its own subdirectory (default: system temp dir)
+    report_artifact_max_bytes: int = 512 * 1024 * 1024
+    report_artifact_ttl: float = 600.0
+    report_generate_wait: float = 25.0  # with "Prefer: respond-async", /reports/generate answers 202 after this long
+    
+    # Startup warm-up: prime the long-lived dashboard aggregates in the background after startup
+    warmup_enabled: bool = False
+    warmup_days: int = 30
+    warmup_min_ttl: float = 60.0  # only cached metrics with at least this TTL are warmed
+    
+    # Health probes: /readyz reads the result of one cheap Firestore read refreshed in the background
+    health_probe_interval: float = 30.0
+    health_probe_timeout: float = 5.0
+    health_probe_max_age: float = 90.0  # not ready once the last success is older than this
+    health_probe_collection: str = "staff"
+    
+    # Prometheus-style /metrics endpoint and request instrumentation
+    metrics_enabled: bool = True
+    
+    # Opt-in request profiling (X-Profile header or ?profile=; see app/profiling.py)
+    profiling_enabled: bool = False
+    profiling_token: str = ""  # when set, profiled requests must send it in X-Profile-Token
+    profiling_max_reports: int = 20
+    profiling_report_lines: int = 60
+    
+    # Response compression (gzip, or brotli when installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    
     # API Configuration
     api_title: str = "Kelly Education Lee County - Analytics API"
     api_version: str = "1.0.0"
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from starlette.requests import HTTPConnection
+
+from app.services.firestore_service import FirestoreService
+from app.services.health import ReadinessProbe
+from app.services.report_jobs import ReportJobManager
+from app.services.stats_broadcaster import StatsBroadcaster
+
+def get_firestore_service(request: Request) -> FirestoreService:
+    """Return the process-wide FirestoreService created at startup"""
+    service = getattr(request.app.state, "firestore_service", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Firestore service not initialized")
+    return service
+
+
+def get_stats_broadcaster(connection: HTTPConnection) -> StatsBroadcaster:
+    """Return the process-wide real-time stats broadcaster"""
+    broadcaster = getattr(connection.app.state, "stats_broadcaster", None)
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="Stats stream not initialized")
+    return broadcaster
+
+
+def get_report_jobs(request: Request) -> ReportJobManager:
+    """Return the process-wide report job manager"""
+    manager = getattr(request.app.state, "report_jobs", None)
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Report jobs not initialized")
+    return manager
+
+
+def get_readiness_probe(request: Request) -> ReadinessProbe:
+    """Return the process-wide cached readiness probe"""
+    probe = getattr(request.app.state, "readiness_probe", None)
+    if probe is None:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+    return probe
+
+
+async def get_data_etag(
+    request: Request,
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+) -> Optional[str]:
+    """Strong ETag for a GET: data version + path + query + current hour
+
+    The hour is part of the tag because trends and "today" counts are
+    relative to now and roll over even when no document changed. Returns
+    None (no conditional handling) if the version cannot be determined.
+    """
+    try:
+        version = await firestore_service.get_data_version()
+    except Exception as e:
+        print(f"⚠️ Could not determine data version: {e}")
+        return None
+    raw = "|".join([
+        version,
+        datetime.now().strftime("%Y-%m-%dT%H"),
+        request.url.path,
+        str(sorted(request.query_params.multi_items())),
+    ])
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """Return a 304 if If-None-Match names ``etag``; otherwise tag ``response`` and return None"""
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,11 +1,25 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+
+# Imported first so the startup report can time the heavy imports below
+from app.startup import startup_report
+startup_report.import_modules()
+
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app import profiling
+from app.compression import CompressionMiddleware
 from app.config import settings
+from app.dependencies import get_readiness_probe
+from app.responses import ORJSONResponse
 from app.routers import analytics, reports, dashboard
+from app.services import figures, metrics
 from app.services.firestore_service import FirestoreService
+from app.services.health import ReadinessProbe
+from app.services.report_jobs import ReportJobManager
+from app.services.stats_broadcaster import StatsBroadcaster
+from app.services.warmup import warm_up
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -13,7 +27,8 @@ app = FastAPI(
     version=settings.api_version,
     description=settings.api_description,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -25,24 +40,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-firestore_service = None
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+if settings.profiling_enabled:
+    app.state.profile_reports = profiling.ReportStore(settings.profiling_max_reports)
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        reports=app.state.profile_reports,
+        token=settings.profiling_token,
+        report_lines=settings.profiling_report_lines,
+    )
+
+if settings.metrics_enabled:
+    # Added last so it is outermost and times the full request
+    app.add_middleware(metrics.MetricsMiddleware)
+
+async def run_warmup(firestore_service: FirestoreService):
+    """Prime the long-lived dashboard aggregates in the background and record it in the startup report"""
+    startup_report.warmup = {"status": "running"}
+    started = asyncio.get_running_loop().time()
+    steps = await warm_up(firestore_service, days=settings.warmup_days, min_ttl=settings.warmup_min_ttl)
+    startup_report.warmup = {
+        "status": "done",
+        "seconds": round(asyncio.get_running_loop().time() - started, 3),
+        "steps": steps,
+    }
+    print(f"🔥 Warm-up finished in {startup_report.warmup['seconds']:.2f}s")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global firestore_service
     try:
-        firestore_service = FirestoreService()
+        with startup_report.phase("firestore_service"):
+            firestore_service = FirestoreService()
+        app.state.firestore_service = firestore_service
         print("✅ Firestore service initialized successfully")
+
+        app.state.stats_broadcaster = StatsBroadcaster(
+            firestore_service.get_real_time_stats,
+            interval=settings.stream_interval,
+            queue_size=settings.stream_client_queue_size,
+        )
+
+        app.state.readiness_probe = ReadinessProbe(
+            firestore_service.probe,
+            interval=settings.health_probe_interval,
+            max_age=settings.health_probe_max_age,
+        )
+        app.state.readiness_probe.start()
+
+        app.state.report_jobs = ReportJobManager(
+            firestore_service,
+            artifact_dir=settings.report_artifact_dir,
+            max_bytes=settings.report_artifact_max_bytes,
+            ttl=settings.report_artifact_ttl,
+            workers=settings.report_workers,
+        )
+
+        if settings.local_store_path:
+            firestore_service.start_local_store_sync()
+            print(f"🗄️ Local store sync started ({settings.local_store_path})")
+
+        if settings.visit_index_enabled:
+            with startup_report.phase("visit_index"):
+                firestore_service.start_visit_index()
+            firestore_service.visit_index.change_listeners.append(app.state.stats_broadcaster.notify)
+            print("🔄 Visit index listeners started")
+
+        if settings.warmup_enabled:
+            app.state.warmup_task = asyncio.create_task(run_warmup(firestore_service))
     except Exception as e:
         print(f"❌ Failed to initialize Firestore service: {e}")
         raise
 
+    startup_report.mark_ready()
+    print(f"⏱️ Startup: {startup_report.summary()}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("🔄 Shutting down API...")
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    stats_broadcaster = getattr(app.state, "stats_broadcaster", None)
+    if stats_broadcaster is not None:
+        await stats_broadcaster.close()
+    readiness_probe = getattr(app.state, "readiness_probe", None)
+    if readiness_probe is not None:
+        await readiness_probe.close()
+    report_jobs = getattr(app.state, "report_jobs", None)
+    if report_jobs is not None:
+        await report_jobs.close()
+    firestore_service = getattr(app.state, "firestore_service", None)
+    if firestore_service is not None:
+        firestore_service.close()
+        app.state.firestore_service = None
 
 # Include routers
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
@@ -59,21 +158,63 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/livez")
+async def liveness_check():
+    """Liveness: the process is up and serving (no dependencies checked)"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_check(
+    readiness_probe: ReadinessProbe = Depends(get_readiness_probe)
+):
+    """Readiness: result of the cached Firestore probe (503 when not ready)"""
+    status = await readiness_probe.status()
+    return ORJSONResponse(status, status_code=200 if status["ready"] else 503)
+
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    try:
-        # Test Firestore connection
-        collections = await firestore_service.test_connection()
-        return {
-            "status": "healthy",
-            "firestore": "connected",
-            "collections_found": len(collections)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Service unavailable: {str(e)}")
+async def health_check(
+    readiness_probe: ReadinessProbe = Depends(get_readiness_probe)
+):
+    """Health check endpoint (same cached probe as /readyz)"""
+    status = await readiness_probe.status()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {status['error'] or 'probe is stale'}")
+    return {
+        "status": "healthy",
+        "firestore": "connected",
+        "probe_latency_ms": status["probe_latency_ms"],
+        "last_success_at": status["last_success_at"]
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, Firestore and cache metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body = metrics.REGISTRY.render()
+    firestore_service = getattr(app.state, "firestore_service", None)
+    if firestore_service is not None and firestore_service.cache is not None:
+        body += metrics.render_cache_stats("result_cache", firestore_service.cache.stats()["metrics"])
+    body += metrics.render_cache_stats("figure_template_cache", figures.template_cache_stats())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/startup", include_in_schema=False)
+async def get_startup_report():
+    """Import times, startup phases and warm-up timings of this process"""
+    return startup_report.to_dict()
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+async def get_profile_report(profile_id: str):
+    """Text report of a request profiled with X-Profile: cprofile|pyinstrument"""
+    reports = getattr(app.state, "profile_reports", None)
+    report = reports.get(profile_id) if reports is not None else None
+    if report is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile report")
+    return PlainTextResponse(report)
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app",
         host=settings.host,
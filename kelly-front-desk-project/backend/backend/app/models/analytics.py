@@ -23,6 +23,7 @@ class DateRangeRequest(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     days: Optional[int] = 30
+    granularity: str = "day"  # "day", "week", "month"
 
 class VisitsAnalytics(BaseModel):
     summary: AnalyticsSummary
@@ -35,9 +36,25 @@ class ReportRequest(BaseModel):
     end_date: Optional[datetime] = None
     format: str = "json"  # "json", "excel", "pdf"
     include_charts: bool = True
+    page_size: Optional[int] = None  # JSON only; without page_size or page_token every record is returned
+    page_token: Optional[str] = None  # next_page_token from the previous page
 
 class ExportRequest(BaseModel):
     collection: str  # "visits", "staff", "document-queue"
-    format: str = "excel"  # "excel", "csv", "json"
+    format: str = "excel"  # "excel", "csv", "ndjson", "json"
     start_date: Optional[datetime] = None
-    end_date: Optional[datetime] = None
\ No newline at end of file
+    end_date: Optional[datetime] = None
+    page_size: Optional[int] = None  # JSON only; without page_size or page_token every record is returned
+    page_token: Optional[str] = None  # next_page_token from the previous page
+
+class MetricSpec(BaseModel):
+    metric: str  # "summary", "trend", "types", "range", "heatmap", "daily-summary", "real-time-stats"
+    id: Optional[str] = None  # key in the batch response; defaults to the metric name
+    days: Optional[int] = None  # trend, heatmap, range
+    date: Optional[str] = None  # daily-summary, YYYY-MM-DD
+    start_date: Optional[datetime] = None  # range
+    end_date: Optional[datetime] = None  # range
+    granularity: str = "day"  # range: "day", "week", "month"
+
+class BatchRequest(BaseModel):
+    metrics: List[MetricSpec]
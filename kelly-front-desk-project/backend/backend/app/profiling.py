@@ -0,0 +1,276 @@
+"""Opt-in per-request profiling: named stage timings and cProfile/pyinstrument reports
+
+With ``PROFILING_ENABLED`` set, a request sent with an ``X-Profile`` header
+(or a ``profile`` query parameter) is profiled:
+
+- ``timing`` (or any other value): code wrapped in ``stage(name)`` is
+  timed and the totals come back in a ``Server-Timing`` header.
+- ``cprofile``: additionally runs cProfile on the event loop thread and
+  around each I/O pool call made for the request.
+- ``pyinstrument``: additionally runs the pyinstrument sampling profiler
+  on the request task (if installed; falls back to cProfile).
+
+Reports are kept in memory and linked from the ``X-Profile-Report``
+header. Stage times are exclusive of nested stages and are summed across
+threads, so stages that ran concurrently can add up to more than the
+wall-clock ``total``. Stages that finish after the response headers were
+sent (streamed bodies) only appear in the report.
+
+When the setting is off the middleware is not installed and ``stage()``
+costs one context variable lookup.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REPORT_KINDS = ("cprofile", "pyinstrument")
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self, report: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.report = report
+        self.started = time.perf_counter()
+        # name -> [seconds, count]
+        self.stages: Dict[str, List[float]] = {}
+        self.notes: List[str] = []
+        self._lock = threading.Lock()
+        self._threads = threading.local()
+        self._thread_profiles: List[cProfile.Profile] = []
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self._threads, "stack", None)
+        if stack is None:
+            stack = self._threads.stack = []
+        return stack
+
+    def _add(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += count
+
+    def _charge_parent(self, seconds: float):
+        stack = self._stack()
+        if stack:
+            stack[-1][0] += seconds
+
+    def record(self, name: str, seconds: float, count: int = 1):
+        """Add time measured by the caller; it is excluded from the enclosing stage"""
+        self._add(name, seconds, count)
+        self._charge_parent(seconds)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][0], reverse=True)
+        entries = [f'{name};dur={seconds * 1000:.2f};desc="{int(count)}x"' for name, (seconds, count) in stages]
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+    def stage_table(self) -> str:
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][0], reverse=True)
+        lines = [f"{'stage':<20}{'ms':>12}{'calls':>8}"]
+        lines += [f"{name:<20}{seconds * 1000:>12.2f}{int(count):>8}" for name, (seconds, count) in stages]
+        lines.append(f"{'total (wall)':<20}{self.elapsed() * 1000:>12.2f}")
+        return "\n".join(lines)
+
+
+class _Stage:
+    __slots__ = ("profile", "name", "frame", "started")
+
+    def __init__(self, profile: RequestProfile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        # frame[0] collects time spent in nested stages
+        self.frame = [0.0]
+        self.profile._stack().append(self.frame)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        stack = self.profile._stack()
+        stack.pop()
+        self.profile._add(self.name, elapsed - self.frame[0])
+        if stack:
+            stack[-1][0] += elapsed
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def current() -> Optional[RequestProfile]:
+    """The profile of the request being served in this context, if it is being profiled"""
+    return _current.get()
+
+
+def stage(name: str):
+    """Context manager timing a named stage of the current profiled request (no-op otherwise)
+
+    Stages nest per thread, so on the event loop they must not span an
+    ``await`` (another task of the same request could interleave).
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NULL_STAGE
+    return _Stage(profile, name)
+
+
+def call(func, *args, **kwargs):
+    """Run ``func`` (on an I/O pool thread) under cProfile when the request asked for a cProfile report"""
+    profile = _current.get()
+    if profile is None or profile.report != "cprofile":
+        return func(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ profiles every thread from the request thread already
+        return func(*args, **kwargs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        with profile._lock:
+            profile._thread_profiles.append(profiler)
+
+
+class ReportStore:
+    """The last ``max_reports`` profile reports, by profile id"""
+
+    def __init__(self, max_reports: int = 20):
+        self.max_reports = max_reports
+        self._reports: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile_id: str, report: str):
+        with self._lock:
+            self._reports[profile_id] = report
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+
+def _requested(scope: Scope) -> Tuple[Optional[str], Optional[str]]:
+    """(profile mode, token) from the X-Profile / X-Profile-Token headers or the profile query parameter"""
+    mode = token = None
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            mode = value.decode("latin-1")
+        elif key == b"x-profile-token":
+            token = value.decode("latin-1")
+    if mode is None and b"profile=" in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1"), keep_blank_values=True).get("profile")
+        if values:
+            mode = values[0]
+    return mode, token
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, reports: ReportStore, token: str = "", report_lines: int = 60,
+                 report_path: str = "/debug/profiles"):
+        self.app = app
+        self.reports = reports
+        self.token = token
+        self.report_lines = report_lines
+        self.report_path = report_path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode, token = _requested(scope)
+        if mode is None or (self.token and token != self.token):
+            await self.app(scope, receive, send)
+            return
+
+        mode = mode.strip().lower()
+        profile = RequestProfile(report=mode if mode in REPORT_KINDS else None)
+        sampler = cprofiler = None
+        if profile.report == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                sampler = Profiler(async_mode="enabled")
+            except ImportError:
+                profile.notes.append("pyinstrument is not installed; using cProfile")
+                profile.report = "cprofile"
+        if profile.report == "cprofile":
+            cprofiler = cProfile.Profile()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                if profile.report:
+                    headers.append((b"x-profile-report", f"{self.report_path}/{profile.id}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        reset_token = _current.set(profile)
+        try:
+            if sampler is not None:
+                sampler.start()
+            if cprofiler is not None:
+                try:
+                    cprofiler.enable()
+                except ValueError:
+                    profile.notes.append("another profiler was active; no cProfile data for this request")
+                    cprofiler = None
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if cprofiler is not None:
+                cprofiler.disable()
+            if sampler is not None:
+                sampler.stop()
+            _current.reset(reset_token)
+            if profile.report:
+                self.reports.add(profile.id, self._report(scope, profile, cprofiler, sampler))
+
+    def _report(self, scope: Scope, profile: RequestProfile, cprofiler, sampler) -> str:
+        query = scope.get("query_string", b"").decode("latin-1")
+        sections = [f"{scope['method']} {scope['path']}{'?' + query if query else ''}", "", profile.stage_table()]
+        sections += profile.notes
+        if sampler is not None:
+            sections += ["", sampler.output_text(unicode=False, color=False)]
+        profilers = ([cprofiler] if cprofiler is not None else []) + profile._thread_profiles
+        if profilers:
+            output = io.StringIO()
+            stats = pstats.Stats(profilers[0], stream=output)
+            for profiler in profilers[1:]:
+                stats.add(profiler)
+            stats.sort_stats("cumulative").print_stats(self.report_lines)
+            sections += ["", f"cProfile: event loop thread + {len(profile._thread_profiles)} I/O pool calls",
+                         output.getvalue()]
+        return "\n".join(sections)
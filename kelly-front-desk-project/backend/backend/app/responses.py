@@ -0,0 +1,47 @@
+"""orjson-backed JSON responses
+
+Returning ``ORJSONResponse(payload)`` from an endpoint skips FastAPI's
+``jsonable_encoder`` walk entirely. DataFrames inside the payload are
+written by pandas' own C serializer and spliced in as pre-encoded JSON,
+so they are never converted to lists of dicts first.
+"""
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+from app import profiling
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not handle natively"""
+    if isinstance(value, pd.DataFrame):
+        return orjson.Fragment(value.to_json(orient='records', date_format='iso', date_unit='us'))
+    if isinstance(value, pd.Series):
+        return orjson.Fragment(value.to_json(orient='values', date_format='iso', date_unit='us'))
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with profiling.stage('json_encode'):
+            return dumps(content)
@@ -2,21 +2,23 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from datetime import datetime, timedelta
 
+from app import profiling
+from app.config import settings
+from app.dependencies import get_firestore_service
+from app.services.analytics_engine import BIN_RULES, to_naive_utc
+from app.services.batch import BatchError, resolve_batch
 from app.services.firestore_service import FirestoreService
 from app.models.analytics import (
     AnalyticsSummary, 
     DailyTrend, 
     DistributionData, 
     VisitsAnalytics,
-    DateRangeRequest
+    DateRangeRequest,
+    BatchRequest
 )
 
 router = APIRouter()
 
-# Dependency to get Firestore service
-def get_firestore_service():
-    return FirestoreService()
-
 @router.get("/summary", response_model=AnalyticsSummary)
 async def get_analytics_summary(
     firestore_service: FirestoreService = Depends(get_firestore_service)
@@ -24,7 +26,8 @@ async def get_analytics_summary(
     """Get basic analytics summary"""
     try:
         summary = await firestore_service.get_analytics_summary()
-        return AnalyticsSummary(**summary)
+        with profiling.stage('validate'):
+            return AnalyticsSummary(**summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -36,7 +39,8 @@ async def get_daily_visits_trend(
     """Get daily visits trend for the last N days"""
     try:
         trend_data = await firestore_service.get_daily_visits_trend(days=days)
-        return DailyTrend(**trend_data)
+        with profiling.stage('validate'):
+            return DailyTrend(**trend_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -47,7 +51,8 @@ async def get_visit_types_distribution(
     """Get distribution of visit types"""
     try:
         distribution = await firestore_service.get_visit_types_distribution()
-        return DistributionData(**distribution)
+        with profiling.stage('validate'):
+            return DistributionData(**distribution)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -58,16 +63,15 @@ async def get_complete_visits_analytics(
 ):
     """Get complete visits analytics including summary, trends, and distributions"""
     try:
-        # Get all analytics data in parallel
-        summary_data = await firestore_service.get_analytics_summary()
-        trend_data = await firestore_service.get_daily_visits_trend(days=days)
-        types_data = await firestore_service.get_visit_types_distribution()
+        # One visits scan feeds summary, trend and types
+        overview = await firestore_service.get_visits_overview(days=days)
         
-        return VisitsAnalytics(
-            summary=AnalyticsSummary(**summary_data),
-            daily_trend=DailyTrend(**trend_data),
-            visit_types=DistributionData(**types_data)
-        )
+        with profiling.stage('validate'):
+            return VisitsAnalytics(
+                summary=AnalyticsSummary(**overview["summary"]),
+                daily_trend=DailyTrend(**overview["daily_trend"]),
+                visit_types=DistributionData(**overview["visit_types"])
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -76,17 +80,48 @@ async def get_visits_custom_range(
     date_request: DateRangeRequest,
     firestore_service: FirestoreService = Depends(get_firestore_service)
 ):
-    """Get visits data for a custom date range"""
+    """Get visits data for a custom date range, binned by day, week or month"""
     try:
         # If no dates provided, use default days parameter
         if not date_request.start_date and not date_request.end_date:
             trend_data = await firestore_service.get_daily_visits_trend(days=date_request.days or 30)
-        else:
-            # Custom date range logic would go here
-            # For now, using the days parameter
-            trend_data = await firestore_service.get_daily_visits_trend(days=date_request.days or 30)
-        
+            return DailyTrend(**trend_data)
+
+        if date_request.granularity not in BIN_RULES:
+            raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(BIN_RULES)}")
+
+        # Compare as naive UTC, like the stored timestamps
+        end_date = to_naive_utc(date_request.end_date) or datetime.now()
+        start_date = to_naive_utc(date_request.start_date) or end_date - timedelta(days=date_request.days or 30)
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+        if end_date - start_date > timedelta(days=settings.custom_range_max_days):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Date range cannot exceed {settings.custom_range_max_days} days"
+            )
+
+        trend_data = await firestore_service.get_visits_range_trend(
+            start_date, end_date, granularity=date_request.granularity
+        )
         return DailyTrend(**trend_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def get_analytics_batch(
+    batch_request: BatchRequest,
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Resolve several metrics in one request from a single shared set of reads"""
+    try:
+        return await resolve_batch(
+            firestore_service, batch_request.metrics, max_days=settings.custom_range_max_days
+        )
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -96,7 +131,60 @@ async def get_available_collections(
 ):
     """Get list of available Firestore collections"""
     try:
-        collections = await firestore_service.test_connection()
+        collections = await firestore_service.get_collection_names()
         return {"collections": collections}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Get result cache hit/miss counters for TTL tuning"""
+    if firestore_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **firestore_service.cache.stats()}
+
+@router.get("/index/status")
+async def get_visit_index_status(
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Get live visit index readiness and staleness"""
+    if firestore_service.visit_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **firestore_service.visit_index.status()}
+
+@router.post("/index/resync")
+async def resync_visit_index(
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Drop the live visit index and reload it from Firestore"""
+    if firestore_service.visit_index is None:
+        raise HTTPException(status_code=400, detail="Visit index is not enabled")
+    try:
+        await firestore_service.resync_visit_index()
+        return {"status": "resyncing", **firestore_service.visit_index.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/local-store/status")
+async def get_local_store_status(
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Get watermarks and document counts of the local analytical mirror"""
+    if firestore_service.local_store is None:
+        return {"enabled": False}
+    return {"enabled": True, "collections": firestore_service.local_store.status()}
+
+@router.post("/local-store/sync")
+async def sync_local_store(
+    full: bool = False,
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Pull new documents into the local mirror (full=true rebuilds it)"""
+    if firestore_service.local_store is None:
+        raise HTTPException(status_code=400, detail="Local store is not enabled")
+    try:
+        return {"collections": await firestore_service.sync_local_store(full=full)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
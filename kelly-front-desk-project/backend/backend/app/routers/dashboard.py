@@ -1,31 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+import asyncio
 import json
 
+from app.config import settings
+from app.dependencies import get_data_etag, get_firestore_service, get_stats_broadcaster, not_modified
+from app.responses import ORJSONResponse
+from app.services import figures
 from app.services.firestore_service import FirestoreService
+from app.services.stats_broadcaster import StatsBroadcaster
 
 router = APIRouter()
 
-def get_firestore_service():
-    return FirestoreService()
-
 @router.get("/widgets")
 async def get_dashboard_widgets(
+    request: Request,
+    response: Response,
+    etag: Optional[str] = Depends(get_data_etag),
     firestore_service: FirestoreService = Depends(get_firestore_service)
 ):
     """Get all dashboard widgets data"""
     try:
-        # Get analytics summary
-        summary = await firestore_service.get_analytics_summary()
-        
-        # Get trend data
-        trend_data = await firestore_service.get_daily_visits_trend(days=30)
-        
-        # Get visit types distribution
-        types_data = await firestore_service.get_visit_types_distribution()
+        unchanged = not_modified(request, response, etag)
+        if unchanged is not None:
+            return unchanged
+
+        # Summary, trend and types from a single visits scan
+        overview = await firestore_service.get_visits_overview(days=30)
+        summary = overview["summary"]
+        trend_data = overview["daily_trend"]
+        types_data = overview["visit_types"]
         
         # Create widgets configuration
         widgets = {
@@ -81,110 +86,106 @@ async def get_dashboard_widgets(
 
 @router.get("/chart/visits-trend")
 async def get_visits_trend_chart(
+    request: Request,
+    response: Response,
     days: int = 30,
     chart_type: str = "line",
+    etag: Optional[str] = Depends(get_data_etag),
     firestore_service: FirestoreService = Depends(get_firestore_service)
 ):
     """Generate visits trend chart data for Plotly"""
     try:
-        trend_data = await firestore_service.get_daily_visits_trend(days=days)
-        
-        if chart_type == "line":
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=trend_data["dates"],
-                y=trend_data["visits"],
-                mode='lines+markers',
-                name='Daily Visits',
-                line=dict(color='#3498db', width=3),
-                marker=dict(size=6)
-            ))
-            
-            fig.update_layout(
-                title=f'Daily Visits Trend ({days} days)',
-                xaxis_title='Date',
-                yaxis_title='Number of Visits',
-                hovermode='x unified',
-                template='plotly_white'
-            )
-        
-        elif chart_type == "bar":
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=trend_data["dates"],
-                y=trend_data["visits"],
-                name='Daily Visits',
-                marker_color='#3498db'
-            ))
-            
-            fig.update_layout(
-                title=f'Daily Visits ({days} days)',
-                xaxis_title='Date',
-                yaxis_title='Number of Visits',
-                template='plotly_white'
-            )
-        
-        else:
+        if chart_type not in figures.TREND_CHART_TYPES:
             raise HTTPException(status_code=400, detail="Invalid chart type")
-        
-        return {
-            "chart_data": fig.to_dict(),
+
+        unchanged = not_modified(request, response, etag)
+        if unchanged is not None:
+            return unchanged
+
+        trend_data = await firestore_service.get_daily_visits_trend(days=days)
+
+        # Returned directly to skip jsonable_encoder, so carry the ETag set on ``response``
+        return ORJSONResponse({
+            "chart_data": figures.visits_trend_figure(chart_type, days, trend_data),
             "raw_data": trend_data
-        }
-        
+        }, headers=dict(response.headers))
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chart/visit-types")
 async def get_visit_types_chart(
+    request: Request,
+    response: Response,
     chart_type: str = "pie",
+    etag: Optional[str] = Depends(get_data_etag),
     firestore_service: FirestoreService = Depends(get_firestore_service)
 ):
     """Generate visit types distribution chart"""
     try:
+        if chart_type not in figures.VISIT_TYPES_CHART_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid chart type")
+
+        unchanged = not_modified(request, response, etag)
+        if unchanged is not None:
+            return unchanged
+
         types_data = await firestore_service.get_visit_types_distribution()
         
         if not types_data["labels"]:
             return {"chart_data": None, "message": "No visit data available"}
         
-        if chart_type == "pie":
-            fig = go.Figure()
-            fig.add_trace(go.Pie(
-                labels=types_data["labels"],
-                values=types_data["values"],
-                hole=0.3,
-                textinfo='label+percent',
-                textposition='outside'
-            ))
-            
-            fig.update_layout(
-                title='Visit Types Distribution',
-                template='plotly_white'
-            )
-        
-        elif chart_type == "bar":
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=types_data["labels"],
-                y=types_data["values"],
-                marker_color='#e74c3c'
-            ))
-            
-            fig.update_layout(
-                title='Visit Types Distribution',
-                xaxis_title='Visit Type',
-                yaxis_title='Count',
-                template='plotly_white'
+        return ORJSONResponse({
+            "chart_data": figures.visit_types_figure(chart_type, types_data),
+            "raw_data": types_data
+        }, headers=dict(response.headers))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/chart/visits-heatmap")
+async def get_visits_heatmap_chart(
+    request: Request,
+    response: Response,
+    days: int = 90,
+    visit_type: Optional[str] = None,
+    etag: Optional[str] = Depends(get_data_etag),
+    firestore_service: FirestoreService = Depends(get_firestore_service)
+):
+    """Generate hour-of-day x weekday visits heatmap for Plotly"""
+    try:
+        if days < 1 or days > settings.custom_range_max_days:
+            raise HTTPException(
+                status_code=400,
+                detail=f"days must be between 1 and {settings.custom_range_max_days}"
             )
-        
+
+        unchanged = not_modified(request, response, etag)
+        if unchanged is not None:
+            return unchanged
+
+        heatmap_data = await firestore_service.get_visits_heatmap(days=days)
+
+        if visit_type is None:
+            matrix = heatmap_data["matrix"]
+            title = f'Visits by Hour and Weekday ({days} days)'
+        elif visit_type in heatmap_data["by_type"]:
+            matrix = heatmap_data["by_type"][visit_type]
+            title = f'{visit_type} Visits by Hour and Weekday ({days} days)'
         else:
-            raise HTTPException(status_code=400, detail="Invalid chart type")
-        
-        return {
-            "chart_data": fig.to_dict(),
-            "raw_data": types_data
-        }
-        
+            return {"chart_data": None, "message": f"No '{visit_type}' visits in the last {days} days"}
+
+        return ORJSONResponse({
+            "chart_data": figures.visits_heatmap_figure(title, heatmap_data, matrix),
+            "raw_data": heatmap_data
+        }, headers=dict(response.headers))
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -194,23 +195,54 @@ async def get_real_time_stats(
 ):
     """Get real-time statistics for live dashboard updates"""
     try:
-        summary = await firestore_service.get_analytics_summary()
-        
-        # Add some calculated metrics
-        week_vs_month_ratio = 0
-        if summary["month_visits"] > 0:
-            week_vs_month_ratio = round((summary["week_visits"] / summary["month_visits"]) * 100, 1)
-        
-        return {
-            "current_stats": summary,
-            "calculated_metrics": {
-                "week_vs_month_ratio": week_vs_month_ratio,
-                "avg_daily_visits": round(summary["month_visits"] / 30, 1) if summary["month_visits"] > 0 else 0,
-                "documents_per_visit": round(summary["pending_documents"] / summary["total_visits"], 2) if summary["total_visits"] > 0 else 0
-            },
-            "status": "active",
-            "timestamp": summary["last_updated"]
-        }
+        return await firestore_service.get_real_time_stats()
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream")
+async def stream_real_time_stats(
+    request: Request,
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster)
+):
+    """Server-Sent Events stream of real-time statistics"""
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=settings.stream_heartbeat_interval)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: stats\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/stream/ws")
+async def stream_real_time_stats_ws(
+    websocket: WebSocket,
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster)
+):
+    """WebSocket stream of real-time statistics"""
+    await websocket.accept()
+    queue = broadcaster.subscribe()
+    try:
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=settings.stream_heartbeat_interval)
+                await websocket.send_json({"type": "stats", "data": payload})
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "heartbeat"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -1,62 +1,189 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from typing import Optional
-import pandas as pd
-import io
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Any, Dict, Optional
 from datetime import datetime
 
-from app.services.firestore_service import FirestoreService
+from app.config import settings
+from app.dependencies import get_firestore_service, get_report_jobs
+from app.responses import ORJSONResponse
+from app.services import analytics_engine, exporters
+from app.services.firestore_service import FirestoreService, OVERVIEW_FIELDS
+from app.services.pagination import InvalidPageToken
+from app.services.report_jobs import DONE, FAILED, RENDERERS, ReportJob, ReportJobManager
 from app.models.analytics import ReportRequest, ExportRequest
 
 router = APIRouter()
 
-def get_firestore_service():
-    return FirestoreService()
+EXPORT_COLLECTIONS = ("visits", "document-queue", "staff")
+
+# report_type -> source collection
+REPORT_COLLECTIONS = {
+    "visits": "visits",
+    "documents": "document-queue",
+    "staff": "staff",
+}
+
+# format -> (serializer, media type, file extension)
+STREAMING_FORMATS = {
+    "csv": (exporters.csv_chunks, "text/csv", "csv"),
+    "ndjson": (exporters.ndjson_chunks, "application/x-ndjson", "ndjson"),
+}
+
+def _date_filters(collection: str, request) -> dict:
+    """Date ranges only apply to visits"""
+    if collection != "visits":
+        return {}
+    return {"start_date": request.start_date, "end_date": request.end_date}
+
+def _file_response(output, media_type: str, filename: str) -> StreamingResponse:
+    """Stream a finished (possibly disk-spooled) file without copying it"""
+    return StreamingResponse(
+        exporters.iter_file(output),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(exporters.file_size(output))
+        }
+    )
+
+def _job_status(job: ReportJob) -> Dict[str, Any]:
+    status = job.to_dict()
+    status["status_url"] = f"/api/v1/reports/jobs/{job.id}"
+    status["download_url"] = f"/api/v1/reports/jobs/{job.id}/download" if job.available else None
+    return status
+
+def _job_file_response(job: ReportJob) -> FileResponse:
+    return FileResponse(job.artifact_path, media_type=job.media_type, filename=job.filename)
+
+def _get_job(report_jobs: ReportJobManager, job_id: str) -> ReportJob:
+    try:
+        return report_jobs.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or expired report job")
 
 @router.post("/generate")
 async def generate_report(
     report_request: ReportRequest,
-    firestore_service: FirestoreService = Depends(get_firestore_service)
+    prefer: Optional[str] = Header(None),
+    firestore_service: FirestoreService = Depends(get_firestore_service),
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
 ):
-    """Generate reports in various formats"""
+    """Generate reports in various formats
+
+    Excel/PDF answer with the file once it is rendered. Clients that send
+    ``Prefer: respond-async`` get 202 with the job status instead if the
+    render takes longer than ``report_generate_wait`` seconds.
+    """
     try:
-        # Get data based on report type
-        if report_request.report_type == "visits":
-            df = await firestore_service.get_visits_data(
-                start_date=report_request.start_date,
-                end_date=report_request.end_date
-            )
-        elif report_request.report_type == "documents":
-            df = await firestore_service.get_document_queue_data()
-        elif report_request.report_type == "staff":
-            df = await firestore_service.get_staff_data()
-        else:
+        collection = REPORT_COLLECTIONS.get(report_request.report_type)
+        if collection is None:
             raise HTTPException(status_code=400, detail="Invalid report type")
 
+        # File formats render in the report job pool
+        if report_request.format in RENDERERS:
+            respond_async = prefer is not None and "respond-async" in prefer.lower()
+            job = report_jobs.submit(
+                report_request.report_type, report_request.format, collection,
+                _date_filters(collection, report_request)
+            )
+            job = await report_jobs.wait(
+                job.id, timeout=settings.report_generate_wait if respond_async else None
+            )
+            if job.status == FAILED:
+                raise HTTPException(status_code=500, detail=job.error)
+            if not job.available:
+                if respond_async:
+                    return ORJSONResponse(_job_status(job), status_code=202)
+                raise HTTPException(status_code=500, detail="Report artifact is no longer available")
+            return _job_file_response(job)
+
         if report_request.format == "json":
-            return {"data": df.to_dict('records'), "total_records": len(df)}
-        
-        elif report_request.format == "excel":
-            # Create Excel file in memory
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=report_request.report_type, index=False)
-            
-            output.seek(0)
-            filename = f"{report_request.report_type}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            
-            return StreamingResponse(
-                io.BytesIO(output.read()),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            if report_request.page_size is None and report_request.page_token is None:
+                # Unpaged callers get every record, streamed page by page
+                pages = firestore_service.iter_collection_pages(
+                    collection, **_date_filters(collection, report_request)
+                )
+                return StreamingResponse(
+                    exporters.json_document_chunks({}, [], pages), media_type="application/json"
+                )
+
+            page = await firestore_service.get_collection_page(
+                collection,
+                page_size=report_request.page_size,
+                page_token=report_request.page_token,
+                **_date_filters(collection, report_request)
             )
+            return ORJSONResponse(page)
         
         else:
             raise HTTPException(status_code=400, detail="Unsupported format")
             
+    except HTTPException:
+        raise
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/jobs", status_code=202)
+async def submit_report_job(
+    report_request: ReportRequest,
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
+):
+    """Queue an excel/pdf report; identical requests within the TTL share one artifact"""
+    collection = REPORT_COLLECTIONS.get(report_request.report_type)
+    if collection is None:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    if report_request.format not in RENDERERS:
+        raise HTTPException(status_code=400, detail=f"Report jobs support: {', '.join(RENDERERS)}")
+
+    job = report_jobs.submit(
+        report_request.report_type, report_request.format, collection,
+        _date_filters(collection, report_request)
+    )
+    return _job_status(job)
+
+@router.get("/jobs")
+async def get_report_jobs_status(
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
+):
+    """Job counts and artifact cache usage"""
+    return report_jobs.status()
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
+):
+    """Status of a report job"""
+    return _job_status(_get_job(report_jobs, job_id))
+
+@router.get("/jobs/{job_id}/wait")
+async def wait_report_job(
+    job_id: str,
+    timeout: float = 30.0,
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
+):
+    """Block until the job finishes or ``timeout`` seconds (max 60) pass, then return its status"""
+    _get_job(report_jobs, job_id)
+    job = await report_jobs.wait(job_id, timeout=min(max(timeout, 0.0), 60.0))
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(
+    job_id: str,
+    report_jobs: ReportJobManager = Depends(get_report_jobs)
+):
+    """Download a finished report artifact"""
+    job = _get_job(report_jobs, job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    if not job.available:
+        raise HTTPException(status_code=410, detail="Report artifact has expired")
+    return _job_file_response(job)
+
 @router.post("/export")
 async def export_data(
     export_request: ExportRequest,
@@ -64,58 +191,68 @@ async def export_data(
 ):
     """Export collection data in various formats"""
     try:
-        # Get data from specified collection
-        if export_request.collection == "visits":
-            df = await firestore_service.get_visits_data(
-                start_date=export_request.start_date,
-                end_date=export_request.end_date
-            )
-        elif export_request.collection == "document-queue":
-            df = await firestore_service.get_document_queue_data()
-        elif export_request.collection == "staff":
-            df = await firestore_service.get_staff_data()
-        else:
+        if export_request.collection not in EXPORT_COLLECTIONS:
             raise HTTPException(status_code=400, detail="Invalid collection name")
 
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No data found for the specified criteria")
-
         filename_base = f"{export_request.collection}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        if export_request.format == "excel":
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=export_request.collection, index=False)
-            
-            output.seek(0)
-            return StreamingResponse(
-                io.BytesIO(output.read()),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment; filename={filename_base}.xlsx"}
+        # File formats (and unpaged JSON) are built page by page straight from Firestore
+        unpaged_json = (export_request.format == "json"
+                        and export_request.page_size is None and export_request.page_token is None)
+        if export_request.format in STREAMING_FORMATS or export_request.format == "excel" or unpaged_json:
+            pages = firestore_service.iter_collection_pages(
+                export_request.collection, **_date_filters(export_request.collection, export_request)
             )
-        
-        elif export_request.format == "csv":
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            output.seek(0)
-            
+            first_page = await anext(pages, None)
+            if not first_page:
+                raise HTTPException(status_code=404, detail="No data found for the specified criteria")
+
+            if export_request.format == "excel":
+                output = await exporters.build_xlsx(
+                    export_request.collection, pages, first_page=first_page,
+                    spool_max_bytes=settings.export_spool_max_bytes
+                )
+                return _file_response(output, exporters.XLSX_MEDIA_TYPE, f"{filename_base}.xlsx")
+
+            if unpaged_json:
+                return StreamingResponse(
+                    exporters.json_document_chunks({
+                        "collection": export_request.collection,
+                        "exported_at": datetime.now().isoformat()
+                    }, first_page, pages),
+                    media_type="application/json"
+                )
+
+            serializer, media_type, extension = STREAMING_FORMATS[export_request.format]
             return StreamingResponse(
-                io.BytesIO(output.getvalue().encode('utf-8')),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename_base}.csv"}
+                serializer(first_page, pages),
+                media_type=media_type,
+                headers={"Content-Disposition": f"attachment; filename={filename_base}.{extension}"}
             )
-        
-        elif export_request.format == "json":
-            return {
+
+        if export_request.format == "json":
+            page = await firestore_service.get_collection_page(
+                export_request.collection,
+                page_size=export_request.page_size,
+                page_token=export_request.page_token,
+                **_date_filters(export_request.collection, export_request)
+            )
+            if not page["data"] and not export_request.page_token:
+                raise HTTPException(status_code=404, detail="No data found for the specified criteria")
+
+            return ORJSONResponse({
                 "collection": export_request.collection,
-                "total_records": len(df),
                 "exported_at": datetime.now().isoformat(),
-                "data": df.to_dict('records')
-            }
+                **page
+            })
         
         else:
             raise HTTPException(status_code=400, detail="Unsupported export format")
             
+    except HTTPException:
+        raise
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -138,28 +275,12 @@ async def get_daily_summary(
         
         visits_df = await firestore_service.get_visits_data(
             start_date=start_datetime,
-            end_date=end_datetime
+            end_date=end_datetime,
+            fields=OVERVIEW_FIELDS
         )
         
-        # Calculate daily metrics
-        total_visits = len(visits_df)
-        
-        # Visit types breakdown
-        visit_types = {}
-        if not visits_df.empty and 'visitType' in visits_df.columns:
-            visit_types = visits_df['visitType'].value_counts().to_dict()
-        
-        # Hourly distribution
-        hourly_visits = {}
-        if not visits_df.empty and 'timestamp' in visits_df.columns:
-            visits_df['hour'] = pd.to_datetime(visits_df['timestamp']).dt.hour
-            hourly_visits = visits_df['hour'].value_counts().sort_index().to_dict()
-        
         return {
-            "date": target_date.isoformat(),
-            "total_visits": total_visits,
-            "visit_types_breakdown": visit_types,
-            "hourly_distribution": hourly_visits,
+            **analytics_engine.daily_summary(visits_df, target_date),
             "generated_at": datetime.now().isoformat()
         }
         
@@ -0,0 +1,203 @@
+"""Pure pandas computations over an already-fetched visits DataFrame
+
+These helpers let one visits scan feed the summary, trend and type
+distribution instead of each metric re-reading the collection.
+"""
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta, timezone
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC like the stored timestamps; aware values are converted, naive ones taken as UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def summarize_visits(visits_df: pd.DataFrame, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Total/today/week/month visit counts from a full visits frame"""
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+
+    total_visits = len(visits_df)
+    if visits_df.empty or 'timestamp' not in visits_df.columns:
+        return {"total_visits": total_visits, "today_visits": 0, "week_visits": 0, "month_visits": 0}
+
+    timestamps = pd.to_datetime(visits_df['timestamp'])
+    return {
+        "total_visits": total_visits,
+        "today_visits": int((timestamps >= today).sum()),
+        "week_visits": int((timestamps >= week_ago).sum()),
+        "month_visits": int((timestamps >= month_ago).sum()),
+    }
+
+
+def daily_trend(visits_df: pd.DataFrame, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Visits per day for the last N days, with missing days filled as 0"""
+    now = now or datetime.now()
+    start_date = now - timedelta(days=days)
+
+    if visits_df.empty or 'timestamp' not in visits_df.columns:
+        return {"dates": [], "visits": []}
+
+    timestamps = pd.to_datetime(visits_df['timestamp'])
+    timestamps = timestamps[timestamps >= start_date]
+    if timestamps.empty:
+        return {"dates": [], "visits": []}
+
+    daily_counts = timestamps.dt.normalize().value_counts()
+    date_range = pd.date_range(start=start_date.date(), end=now.date(), freq='D')
+    counts = daily_counts.reindex(date_range, fill_value=0)
+
+    return {
+        "dates": [d.strftime('%Y-%m-%d') for d in date_range],
+        "visits": counts.astype(int).tolist()
+    }
+
+
+# granularity -> pandas resample rule
+BIN_RULES = {
+    'day': 'D',
+    'week': 'W-MON',
+    'month': 'MS',
+}
+
+
+def binned_trend(visits_df: pd.DataFrame, start_date: datetime, end_date: datetime,
+                 granularity: str = 'day') -> Dict[str, Any]:
+    """Visits per day/week/month between two dates, labelled by bin start"""
+    rule = BIN_RULES[granularity]
+    if granularity == 'week':
+        # Weeks start on Monday and are labelled by that Monday
+        first_bin = (pd.Timestamp(start_date) - pd.Timedelta(days=start_date.weekday())).normalize()
+        resample_args = {'label': 'left', 'closed': 'left'}
+    elif granularity == 'month':
+        first_bin = pd.Timestamp(start_date).normalize().replace(day=1)
+        resample_args = {}
+    else:
+        first_bin = pd.Timestamp(start_date).normalize()
+        resample_args = {}
+    bins = pd.date_range(start=first_bin, end=pd.Timestamp(end_date), freq=rule)
+
+    counts = pd.Series(0, index=bins, dtype='int64')
+    if not visits_df.empty and 'timestamp' in visits_df.columns:
+        timestamps = pd.to_datetime(visits_df['timestamp']).dropna()
+        timestamps = timestamps[(timestamps >= start_date) & (timestamps <= end_date)]
+        if not timestamps.empty:
+            binned = pd.Series(1, index=pd.DatetimeIndex(timestamps)).resample(rule, **resample_args).sum()
+            counts = binned.reindex(bins, fill_value=0).astype('int64')
+
+    return {
+        "dates": [d.strftime('%Y-%m-%d') for d in bins],
+        "visits": counts.tolist()
+    }
+
+
+def visit_types_distribution(visits_df: pd.DataFrame) -> Dict[str, Any]:
+    """Count of visits per visitType"""
+    if visits_df.empty or 'visitType' not in visits_df.columns:
+        return {"labels": [], "values": []}
+
+    type_counts = visits_df['visitType'].value_counts()
+    # Categorical columns also report unused categories
+    type_counts = type_counts[type_counts > 0]
+    return {
+        "labels": type_counts.index.tolist(),
+        "values": [int(v) for v in type_counts.values]
+    }
+
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+HEATMAP_CELLS = len(WEEKDAYS) * 24
+
+
+def heatmap_payload(matrix: np.ndarray, by_type: Dict[str, np.ndarray], days: int) -> Dict[str, Any]:
+    """JSON shape shared by the pandas and index heatmaps (weekday rows, hour columns)"""
+    return {
+        "weekdays": WEEKDAYS,
+        "hours": list(range(24)),
+        "matrix": matrix.tolist(),
+        "by_type": {label: counts.tolist() for label, counts in by_type.items()},
+        "total_visits": int(matrix.sum()),
+        "days": days
+    }
+
+
+def hour_weekday_heatmap(visits_df: pd.DataFrame, days: int) -> Dict[str, Any]:
+    """Visits per weekday x hour-of-day, overall and per visitType
+
+    Timestamps are reduced to epoch seconds and binned with ``np.bincount``
+    on a single ``weekday * 24 + hour`` cell index, so a year of visits is
+    one pass over an int64 array.
+    """
+    matrix = np.zeros((len(WEEKDAYS), 24), dtype=np.int64)
+    if visits_df.empty or 'timestamp' not in visits_df.columns:
+        return heatmap_payload(matrix, {}, days)
+
+    timestamps = pd.to_datetime(visits_df['timestamp'])
+    valid = timestamps.notna().to_numpy()
+    seconds = timestamps[valid].to_numpy().astype('datetime64[s]').astype(np.int64)
+    # 1970-01-01 was a Thursday (weekday 3 with Monday = 0)
+    weekday = (seconds // 86400 + 3) % 7
+    hour = (seconds // 3600) % 24
+    cells = weekday * 24 + hour
+    matrix = np.bincount(cells, minlength=HEATMAP_CELLS).reshape(len(WEEKDAYS), 24)
+
+    by_type: Dict[str, np.ndarray] = {}
+    if 'visitType' in visits_df.columns:
+        types = pd.Categorical(visits_df['visitType'][valid])
+        codes = np.asarray(types.codes, dtype=np.int64)
+        known = codes >= 0
+        stacked = np.bincount(
+            codes[known] * HEATMAP_CELLS + cells[known],
+            minlength=len(types.categories) * HEATMAP_CELLS
+        ).reshape(len(types.categories), len(WEEKDAYS), 24)
+        by_type = {
+            str(label): stacked[i] for i, label in enumerate(types.categories) if stacked[i].any()
+        }
+
+    return heatmap_payload(matrix, by_type, days)
+
+
+def daily_summary(visits_df: pd.DataFrame, target_date: date) -> Dict[str, Any]:
+    """Visit count, type breakdown and hourly distribution for one calendar day"""
+    visit_types: Dict[str, int] = {}
+    hourly_visits: Dict[int, int] = {}
+    if not visits_df.empty and 'timestamp' in visits_df.columns:
+        timestamps = pd.to_datetime(visits_df['timestamp'])
+        start = datetime.combine(target_date, datetime.min.time())
+        visits_df = visits_df[(timestamps >= start) & (timestamps < start + timedelta(days=1))]
+        hours = pd.to_datetime(visits_df['timestamp']).dt.hour
+        hourly_visits = {int(k): int(v) for k, v in hours.value_counts().sort_index().items()}
+
+    if not visits_df.empty and 'visitType' in visits_df.columns:
+        visit_types = {k: int(v) for k, v in visits_df['visitType'].value_counts().items() if v > 0}
+
+    return {
+        "date": target_date.isoformat(),
+        "total_visits": len(visits_df),
+        "visit_types_breakdown": visit_types,
+        "hourly_distribution": hourly_visits
+    }
+
+
+def real_time_stats(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Live dashboard payload: the summary plus derived ratios"""
+    week_vs_month_ratio = 0
+    if summary["month_visits"] > 0:
+        week_vs_month_ratio = round((summary["week_visits"] / summary["month_visits"]) * 100, 1)
+
+    return {
+        "current_stats": summary,
+        "calculated_metrics": {
+            "week_vs_month_ratio": week_vs_month_ratio,
+            "avg_daily_visits": round(summary["month_visits"] / 30, 1) if summary["month_visits"] > 0 else 0,
+            "documents_per_visit": round(summary["pending_documents"] / summary["total_visits"], 2) if summary["total_visits"] > 0 else 0
+        },
+        "status": "active",
+        "timestamp": summary["last_updated"]
+    }
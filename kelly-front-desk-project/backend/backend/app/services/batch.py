@@ -0,0 +1,167 @@
+"""Resolve many analytics metrics from one shared set of reads
+
+A batch is planned before anything is fetched: every metric declares the
+visits window and fields it needs, and the windows are merged into a single
+visits query (the whole collection as soon as any metric needs all of it).
+All metrics are then computed over that shared frame. Metrics the live
+visit index can answer are taken from it and never enter the plan, and
+summary/real-time-stats always come from their FirestoreService methods:
+those use count() aggregations and the result cache, which is far cheaper
+than the full visits scan the summary would otherwise force on the batch.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from app.services import analytics_engine
+from app.services.analytics_engine import BIN_RULES
+
+MAX_BATCH_METRICS = 25
+
+METRICS = ("summary", "trend", "types", "range", "heatmap", "daily-summary", "real-time-stats")
+
+# Metrics answered by FirestoreService methods (from the visit index when it is live)
+SERVICE_METHODS = {
+    "summary": lambda service, params: service.get_analytics_summary(),
+    "real-time-stats": lambda service, params: service.get_real_time_stats(),
+    "trend": lambda service, params: service.get_daily_visits_trend(days=params["days"]),
+    "types": lambda service, params: service.get_visit_types_distribution(),
+    "heatmap": lambda service, params: service.get_visits_heatmap(days=params["days"]),
+}
+
+# Always answered by their service method, index or not
+COUNTED_METRICS = ("summary", "real-time-stats")
+
+
+class BatchError(ValueError):
+    """A metric spec is unknown or has invalid parameters"""
+
+
+def _check_days(days: int, max_days: int) -> int:
+    if days < 1 or days > max_days:
+        raise BatchError(f"days must be between 1 and {max_days}")
+    return days
+
+
+def _plan_metric(spec, now: datetime, max_days: int) -> Dict[str, Any]:
+    """Normalized parameters plus the visits window/fields the metric needs
+
+    ``start`` of None means the metric needs the whole collection.
+    """
+    metric = spec.metric
+    if metric in COUNTED_METRICS:
+        return {"params": {}}
+    if metric == "types":
+        return {"params": {}, "start": None, "end": None, "fields": {"visitType"}}
+    if metric in ("trend", "heatmap"):
+        days = _check_days(spec.days or (30 if metric == "trend" else 90), max_days)
+        fields = {"timestamp"} if metric == "trend" else {"timestamp", "visitType"}
+        return {"params": {"days": days}, "start": now - timedelta(days=days), "end": None, "fields": fields}
+    if metric == "range":
+        if spec.granularity not in BIN_RULES:
+            raise BatchError(f"granularity must be one of: {', '.join(BIN_RULES)}")
+        end = analytics_engine.to_naive_utc(spec.end_date) or now
+        start = analytics_engine.to_naive_utc(spec.start_date) or end - timedelta(days=spec.days or 30)
+        if start > end:
+            raise BatchError("start_date must be before end_date")
+        if end - start > timedelta(days=max_days):
+            raise BatchError(f"Date range cannot exceed {max_days} days")
+        return {"params": {"start": start, "end": end, "granularity": spec.granularity},
+                "start": start, "end": end, "fields": {"timestamp"}}
+    if metric == "daily-summary":
+        try:
+            target = datetime.strptime(spec.date, '%Y-%m-%d').date() if spec.date else now.date()
+        except ValueError:
+            raise BatchError("date must be YYYY-MM-DD")
+        start = datetime.combine(target, datetime.min.time())
+        return {"params": {"date": target}, "start": start, "end": datetime.combine(target, datetime.max.time()),
+                "fields": {"timestamp", "visitType"}}
+    raise BatchError(f"Unknown metric '{metric}'; expected one of: {', '.join(METRICS)}")
+
+
+def _merge_windows(plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One visits read covering every planned window (None bounds are open)"""
+    if not plans:
+        return {"fetch": False}
+    full = any(plan["start"] is None for plan in plans)
+    open_ended = any(plan["end"] is None for plan in plans)
+    return {
+        "fetch": True,
+        "start": None if full else min(plan["start"] for plan in plans),
+        "end": None if full or open_ended else max(plan["end"] for plan in plans),
+        "fields": sorted(set().union(*(plan["fields"] for plan in plans))),
+    }
+
+
+def _compute(metric: str, params: Dict[str, Any], visits_df, now: datetime) -> Dict[str, Any]:
+    if metric == "types":
+        return analytics_engine.visit_types_distribution(visits_df)
+    if metric == "trend":
+        return analytics_engine.daily_trend(visits_df, days=params["days"], now=now)
+    if metric == "heatmap":
+        window = visits_df
+        if not visits_df.empty and "timestamp" in visits_df.columns:
+            window = visits_df[visits_df["timestamp"] >= now - timedelta(days=params["days"])]
+        return analytics_engine.hour_weekday_heatmap(window, days=params["days"])
+    if metric == "range":
+        return analytics_engine.binned_trend(visits_df, params["start"], params["end"], params["granularity"])
+    if metric == "daily-summary":
+        return analytics_engine.daily_summary(visits_df, params["date"])
+    raise BatchError(f"Unknown metric '{metric}'")
+
+
+async def resolve_batch(firestore_service, specs, max_days: int) -> Dict[str, Any]:
+    """Plan, fetch once, and compute every requested metric"""
+    if not specs:
+        raise BatchError("At least one metric is required")
+    if len(specs) > MAX_BATCH_METRICS:
+        raise BatchError(f"A batch can request at most {MAX_BATCH_METRICS} metrics")
+
+    now = datetime.now()
+    planned = []
+    for spec in specs:
+        key = spec.id or spec.metric
+        if any(key == other for other, _, _ in planned):
+            raise BatchError(f"Duplicate metric id '{key}'; set a distinct id per spec")
+        planned.append((key, spec.metric, _plan_metric(spec, now, max_days)))
+
+    index = firestore_service.visit_index
+    index_live = index is not None and not index.stale
+
+    def from_service(metric: str) -> bool:
+        return metric in COUNTED_METRICS or (index_live and metric in SERVICE_METHODS)
+
+    delegated = [(key, metric, plan) for key, metric, plan in planned if from_service(metric)]
+    from_scan = [(key, metric, plan) for key, metric, plan in planned if not from_service(metric)]
+
+    window = _merge_windows([plan for _, _, plan in from_scan])
+
+    async def scan():
+        if not window["fetch"]:
+            return None
+        return await firestore_service.get_visits_data(
+            start_date=window["start"], end_date=window["end"], fields=window["fields"]
+        )
+
+    visits_df, *delegated_results = await asyncio.gather(
+        scan(),
+        *(SERVICE_METHODS[metric](firestore_service, plan["params"]) for _, metric, plan in delegated)
+    )
+
+    results = {key: result for (key, _, _), result in zip(delegated, delegated_results)}
+    for key, metric, plan in from_scan:
+        results[key] = _compute(metric, plan["params"], visits_df, now)
+
+    return {
+        "results": {key: results[key] for key, _, _ in planned},
+        "plan": {
+            "from_index": [key for key, metric, _ in delegated if index_live and metric in SERVICE_METHODS],
+            "from_counts": [key for key, metric, _ in delegated if not index_live and metric in COUNTED_METRICS],
+            "visits_read": {
+                "start_date": window["start"].isoformat() if window.get("start") else None,
+                "end_date": window["end"].isoformat() if window.get("end") else None,
+                "fields": window["fields"],
+            } if window["fetch"] else None,
+        },
+        "generated_at": now.isoformat()
+    }
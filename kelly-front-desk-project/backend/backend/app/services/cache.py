@@ -0,0 +1,170 @@
+"""In-process result cache for FirestoreService aggregate methods
+
+Entries expire after a per-metric TTL, are evicted least-recently-used once
+the entry or byte budget is exceeded, and concurrent misses for the same key
+share one computation (single flight), so a burst of dashboard polls costs a
+single Firestore scan.
+"""
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint by serialized length"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _retrieve_exception(task: asyncio.Task):
+    """Mark a failure retrieved so it is not logged when every waiter was cancelled"""
+    if not task.cancelled():
+        task.exception()
+
+
+class ResultCache:
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 30.0,
+                 max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        # key -> (computing task, generation it was started in)
+        self._inflight: Dict[Hashable, Tuple[asyncio.Future, int]] = {}
+        # Bumped by invalidate(); results of computations started before are not kept
+        self._generation = 0
+        self._bytes = 0
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        )
+
+    def ttl_for(self, metric: str) -> float:
+        return self.ttls.get(metric, self.default_ttl)
+
+    async def get_or_compute(self, metric: str, key: Hashable,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh cached value or run ``compute`` once for all waiters"""
+        counters = self._counters[metric]
+        key = (metric, key)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                counters["hits"] += 1
+                return entry.value
+            self._remove(key)
+
+        generation = self._generation
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[1] == generation:
+            counters["coalesced"] += 1
+            return await asyncio.shield(inflight[0])
+
+        counters["misses"] += 1
+        # The computation is its own task: a caller that is cancelled (e.g. a
+        # client disconnect) stops waiting but does not cancel it for the others
+        task = asyncio.ensure_future(self._compute(metric, key, compute, generation))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[key] = (task, generation)
+        return await asyncio.shield(task)
+
+    async def _compute(self, metric: str, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                       generation: int) -> Any:
+        try:
+            value = await compute()
+        finally:
+            if self._inflight.get(key, (None,))[0] is asyncio.current_task():
+                del self._inflight[key]
+        if generation == self._generation:
+            self._store(metric, key, value)
+        return value
+
+    def _store(self, metric: str, key: Hashable, value: Any):
+        ttl = self.ttl_for(metric)
+        if ttl <= 0:
+            return
+
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            evicted_key, _ = next(iter(self._entries.items()))
+            self._remove(evicted_key)
+            self._counters[evicted_key[0]]["evictions"] += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate(self, metric: Optional[str] = None, keep: Iterable[str] = ()):
+        """Drop every entry (except the ``keep`` metrics), or only those of one metric
+
+        Computations already in flight still answer their callers, but their
+        results are not stored and later misses start a fresh computation.
+        """
+        self._generation += 1
+        keep = set(keep)
+        for key in [k for k in self._entries if (metric is None or k[0] == metric) and k[0] not in keep]:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        metrics = {}
+        for metric, counters in self._counters.items():
+            lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+            metrics[metric] = {
+                **counters,
+                "ttl_seconds": self.ttl_for(metric),
+                "hit_ratio": round((counters["hits"] + counters["coalesced"]) / lookups, 3) if lookups else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "metrics": metrics,
+        }
+
+
+def cached(metric: str):
+    """Cache an async service method in ``self.cache`` keyed by its bound arguments"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "cache", None)
+            if cache is None:
+                return await func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((name, value) for name, value in bound.arguments.items() if name != "self")
+            return await cache.get_or_compute(metric, key, lambda: func(self, *args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+"""Schema-aware columnar DataFrame construction from Firestore snapshots
+
+Instead of materializing one dict per document and letting pandas infer a
+schema, values are appended straight into per-column buffers. Timestamp
+columns are converted to naive-UTC datetime64 (int64 epoch) and low
+cardinality columns to categoricals in one vectorized step per column.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# Column dtypes per collection; unlisted fields stay as object columns
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    'visits': {'timestamp': 'datetime', 'visitType': 'category'},
+    'document-queue': {'submittedAt': 'datetime', 'status': 'category'},
+    'staff': {},
+}
+
+
+class ColumnarFrameBuilder:
+    def __init__(self, schema: Optional[Dict[str, str]] = None):
+        self.schema = schema or {}
+        self.columns: Dict[str, List[Any]] = {}
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, doc_id: str, data: Dict[str, Any]):
+        rows = len(self.ids)
+        columns = self.columns
+        for key, value in data.items():
+            column = columns.get(key)
+            if column is None:
+                # Field first seen now: backfill earlier rows
+                column = columns[key] = [None] * rows
+            column.append(value)
+        self.ids.append(doc_id)
+
+        if len(data) != len(columns):
+            # Pad fields this document does not have
+            rows += 1
+            for column in columns.values():
+                if len(column) < rows:
+                    column.append(None)
+
+    def extend(self, snapshots: Iterable) -> 'ColumnarFrameBuilder':
+        for doc in snapshots:
+            self.append(doc.id, doc.to_dict())
+        return self
+
+    def build(self) -> pd.DataFrame:
+        frame: Dict[str, Any] = {}
+        for name, values in self.columns.items():
+            kind = self.schema.get(name)
+            if kind == 'datetime':
+                # One vectorized pass: parse, convert to UTC, drop the timezone
+                frame[name] = pd.to_datetime(values, utc=True, errors='coerce').tz_convert(None)
+            elif kind == 'category':
+                frame[name] = pd.Categorical(values)
+            else:
+                frame[name] = pd.Series(values, dtype=object)
+        frame['id'] = self.ids
+        return pd.DataFrame(frame)
+
+
+def frame_from_snapshots(collection_name: str, snapshots: Iterable) -> pd.DataFrame:
+    """Build a typed DataFrame for a collection from an iterable of snapshots"""
+    return ColumnarFrameBuilder(SCHEMAS.get(collection_name)).extend(snapshots).build()
@@ -0,0 +1,289 @@
+"""Incremental serializers that turn pages of Firestore records into bytes
+
+Each page is encoded and yielded as soon as it arrives, so an export holds
+at most one page in memory and the first bytes go out immediately.
+"""
+import asyncio
+import csv
+import io
+import json
+import pickle
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_MEDIA_TYPE = "application/pdf"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return str(value.replace(tzinfo=None))
+    return value
+
+
+def _fieldnames(records: Iterable[Dict], fieldnames: Optional[List[str]] = None) -> List[str]:
+    """Fields in order of first appearance, appended to ``fieldnames`` if given"""
+    fieldnames = [] if fieldnames is None else fieldnames
+    for record in records:
+        fieldnames.extend(key for key in record if key not in fieldnames)
+    return fieldnames
+
+
+async def csv_chunks(first_page: List[Dict], pages: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """Stream CSV; the header is taken from the fields present in the first page
+
+    Documents are schema-less, so fields that first appear after the first
+    page are left out of the CSV; use ndjson for a lossless export.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_fieldnames(first_page), extrasaction='ignore')
+    writer.writeheader()
+
+    async for page in _chain(first_page, pages):
+        for record in page:
+            writer.writerow({key: _csv_value(value) for key, value in record.items()})
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def ndjson_chunks(first_page: List[Dict], pages: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """Stream newline-delimited JSON, one document per line"""
+    async for page in _chain(first_page, pages):
+        yield ''.join(json.dumps(record, default=str) + '\n' for record in page).encode('utf-8')
+
+
+async def json_document_chunks(fields: Dict[str, Any], first_page: List[Dict],
+                               pages: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """Stream one JSON object with every record under ``data``, the shape of an unpaged response
+
+    ``fields`` are written first; ``total_records`` is only known once the
+    last page is out, so it closes the object.
+    """
+    # Imported here so report worker processes, which import this module, skip fastapi/pandas
+    from app.responses import dumps
+
+    head = dumps(fields)[:-1]
+    yield head + (b',' if fields else b'') + b'"data":['
+    total = 0
+    async for page in _chain(first_page, pages):
+        if page:
+            yield (b',' if total else b'') + b','.join(dumps(record) for record in page)
+            total += len(page)
+    yield b'],' + dumps({"total_records": total, "has_more": False, "next_page_token": None})[1:]
+
+
+async def _chain(first_page: List[Dict], pages: AsyncIterator[List[Dict]]) -> AsyncIterator[List[Dict]]:
+    yield first_page
+    async for page in pages:
+        yield page
+
+
+def _xlsx_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Excel has no timezone support
+        return value.replace(tzinfo=None)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class XlsxBuilder:
+    """Row-by-row xlsx writer using openpyxl's write-only mode
+
+    Rows are flushed to openpyxl's own temp storage as they are appended,
+    and the finished workbook is saved into a spooled temp file that stays
+    in memory below ``spool_max_bytes`` and moves to disk above it.
+    """
+
+    def __init__(self, sheet_name: str, spool_max_bytes: int = 8 * 1024 * 1024,
+                 fieldnames: Optional[List[str]] = None):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        # Excel caps sheet names at 31 characters
+        self.sheet = self.workbook.create_sheet(title=sheet_name[:31])
+        self.spool_max_bytes = spool_max_bytes
+        self.fieldnames = fieldnames
+        self.rows = 0
+        self._header_written = False
+
+    def append_page(self, page: List[Dict]):
+        """Append records under ``fieldnames``, or the first page's fields if none were given"""
+        if not self._header_written:
+            if self.fieldnames is None:
+                self.fieldnames = _fieldnames(page)
+            self.sheet.append(self.fieldnames)
+            self._header_written = True
+        for record in page:
+            self.sheet.append([_xlsx_value(record.get(name)) for name in self.fieldnames])
+        self.rows += len(page)
+
+    def finish(self) -> BinaryIO:
+        """Save the workbook and return the file positioned at its start"""
+        output = tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes)
+        self.workbook.save(output)
+        output.seek(0)
+        return output
+
+
+def _pdf_value(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    return str(value)
+
+
+class PdfBuilder:
+    """Row-by-row tabular PDF drawn directly on a reportlab canvas
+
+    Same interface as ``XlsxBuilder``. Rows are drawn as they are appended
+    and each finished page is flushed, so memory stays flat however long
+    the report is. Cells wider than their column are truncated.
+    """
+    FONT = "Helvetica"
+    FONT_SIZE = 7
+    ROW_HEIGHT = 10
+    MARGIN = 36
+
+    def __init__(self, title: str, spool_max_bytes: int = 8 * 1024 * 1024,
+                 fieldnames: Optional[List[str]] = None):
+        from reportlab.lib.pagesizes import landscape, letter
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.pdfgen import canvas
+
+        self._string_width = stringWidth
+        self.output = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+        self.canvas = canvas.Canvas(self.output, pagesize=landscape(letter), pageCompression=1)
+        self.canvas.setTitle(title)
+        self.width, self.height = landscape(letter)
+        self.title = title
+        self.fieldnames = fieldnames
+        self.rows = 0
+        self.page = 1
+        self._y = 0.0
+        self._started = False
+
+    def _truncate(self, text: str, width: float) -> str:
+        if self._string_width(text, self.FONT, self.FONT_SIZE) <= width:
+            return text
+        while text and self._string_width(text + '…', self.FONT, self.FONT_SIZE) > width:
+            text = text[:-1]
+        return text + '…'
+
+    def _draw_row(self, values: List[str], bold: bool = False):
+        self.canvas.setFont(self.FONT + ("-Bold" if bold else ""), self.FONT_SIZE)
+        column_width = (self.width - 2 * self.MARGIN) / max(len(values), 1)
+        for i, value in enumerate(values):
+            x = self.MARGIN + i * column_width
+            self.canvas.drawString(x, self._y, self._truncate(value, column_width - 4))
+        self._y -= self.ROW_HEIGHT
+
+    def _start_page(self):
+        self._started = True
+        self._y = self.height - self.MARGIN
+        if self.page == 1:
+            self.canvas.setFont(self.FONT + "-Bold", 12)
+            self.canvas.drawString(self.MARGIN, self._y, self.title)
+            self._y -= 2 * self.ROW_HEIGHT
+        self._draw_row(self.fieldnames, bold=True)
+
+    def _end_page(self):
+        self.canvas.setFont(self.FONT, self.FONT_SIZE)
+        self.canvas.drawRightString(self.width - self.MARGIN, self.MARGIN / 2, f"Page {self.page}")
+        self.canvas.showPage()
+        self.page += 1
+
+    def append_page(self, page: List[Dict]):
+        """Append records under ``fieldnames``, or the first page's fields if none were given"""
+        if not self._started:
+            if self.fieldnames is None:
+                self.fieldnames = _fieldnames(page)
+            self._start_page()
+        for record in page:
+            if self._y < self.MARGIN:
+                self._end_page()
+                self._start_page()
+            self._draw_row([_pdf_value(record.get(name)) for name in self.fieldnames])
+        self.rows += len(page)
+
+    def finish(self) -> BinaryIO:
+        """Save the document and return the file positioned at its start"""
+        if not self._started:
+            self.fieldnames = self.fieldnames or []
+            self._start_page()
+        self._end_page()
+        self.canvas.save()
+        self.output.seek(0)
+        return self.output
+
+
+def spool_page(spool: BinaryIO, page: List[Dict]):
+    """Pickle one page after those already in ``spool``"""
+    pickle.dump(page, spool, pickle.HIGHEST_PROTOCOL)
+
+
+def iter_spooled_pages(spool: BinaryIO) -> Iterator[List[Dict]]:
+    """Read pages written by ``spool_page`` back in order"""
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def build_from_spool(builder_factory: Callable[[List[str]], Any], spool: BinaryIO) -> Any:
+    """Run the pages in ``spool`` through a builder and return it
+
+    A first pass collects the header from every page, since a field can
+    first appear on any of them; the second pass writes the rows.
+    """
+    fieldnames: List[str] = []
+    for page in iter_spooled_pages(spool):
+        _fieldnames(page, fieldnames)
+    spool.seek(0)
+    builder = builder_factory(fieldnames)
+    for page in iter_spooled_pages(spool):
+        builder.append_page(page)
+    return builder
+
+
+async def build_xlsx(sheet_name: str, pages: AsyncIterator[List[Dict]],
+                     first_page: Optional[List[Dict]] = None,
+                     spool_max_bytes: int = 8 * 1024 * 1024) -> BinaryIO:
+    """Spool pages as they arrive, then write them into an xlsx file, off the event loop"""
+    with tempfile.SpooledTemporaryFile(max_size=spool_max_bytes) as spool:
+        if first_page:
+            await asyncio.to_thread(spool_page, spool, first_page)
+        async for page in pages:
+            await asyncio.to_thread(spool_page, spool, page)
+        spool.seek(0)
+        builder = await asyncio.to_thread(
+            build_from_spool,
+            lambda fieldnames: XlsxBuilder(sheet_name, spool_max_bytes=spool_max_bytes, fieldnames=fieldnames),
+            spool
+        )
+    return await asyncio.to_thread(builder.finish)
+
+
+def file_size(output: BinaryIO) -> int:
+    output.seek(0, io.SEEK_END)
+    size = output.tell()
+    output.seek(0)
+    return size
+
+
+def iter_file(output: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Read a finished file out in chunks and close it afterwards"""
+    try:
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        output.close()
@@ -0,0 +1,169 @@
+"""Prebuilt Plotly figure templates for the dashboard charts
+
+Building a ``go.Figure`` validates every property and ``to_dict()`` walks
+the whole tree again, on every request. Here each chart variant (chart
+type plus the parameters that appear in its layout) is built once with
+empty data arrays; requests copy the cached dict and swap the arrays in.
+Plotly itself is only imported when the first template is built.
+"""
+import functools
+from typing import Any, Dict, List, Sequence, Tuple
+
+TREND_CHART_TYPES = ("line", "bar")
+VISIT_TYPES_CHART_TYPES = ("pie", "bar")
+
+# Bound on distinct cached templates (chart type x days x visit type)
+TEMPLATE_CACHE_SIZE = 128
+
+
+@functools.lru_cache(maxsize=None)
+def _graph_objects():
+    import plotly.graph_objects as go
+    return go
+
+
+def _fill(template: Dict[str, Any], *traces: Dict[str, Sequence]) -> Dict[str, Any]:
+    """Copy of a cached figure dict with each trace's data arrays replaced
+
+    Only the top-level dict, the trace list and the traces themselves are
+    copied; the (read-only) layout is shared with the template.
+    """
+    data = []
+    for trace, arrays in zip(template["data"], traces):
+        trace = dict(trace)
+        trace.update({key: list(values) for key, values in arrays.items()})
+        data.append(trace)
+    return {**template, "data": data}
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _visits_trend_template(chart_type: str, days: int) -> Dict[str, Any]:
+    go = _graph_objects()
+    fig = go.Figure()
+    if chart_type == "line":
+        fig.add_trace(go.Scatter(
+            x=[],
+            y=[],
+            mode='lines+markers',
+            name='Daily Visits',
+            line=dict(color='#3498db', width=3),
+            marker=dict(size=6)
+        ))
+
+        fig.update_layout(
+            title=f'Daily Visits Trend ({days} days)',
+            xaxis_title='Date',
+            yaxis_title='Number of Visits',
+            hovermode='x unified',
+            template='plotly_white'
+        )
+    else:
+        fig.add_trace(go.Bar(
+            x=[],
+            y=[],
+            name='Daily Visits',
+            marker_color='#3498db'
+        ))
+
+        fig.update_layout(
+            title=f'Daily Visits ({days} days)',
+            xaxis_title='Date',
+            yaxis_title='Number of Visits',
+            template='plotly_white'
+        )
+    return fig.to_dict()
+
+
+def visits_trend_figure(chart_type: str, days: int, trend_data: Dict[str, List]) -> Dict[str, Any]:
+    return _fill(
+        _visits_trend_template(chart_type, days),
+        {"x": trend_data["dates"], "y": trend_data["visits"]}
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _visit_types_template(chart_type: str) -> Dict[str, Any]:
+    go = _graph_objects()
+    fig = go.Figure()
+    if chart_type == "pie":
+        fig.add_trace(go.Pie(
+            labels=[],
+            values=[],
+            hole=0.3,
+            textinfo='label+percent',
+            textposition='outside'
+        ))
+
+        fig.update_layout(
+            title='Visit Types Distribution',
+            template='plotly_white'
+        )
+    else:
+        fig.add_trace(go.Bar(
+            x=[],
+            y=[],
+            marker_color='#e74c3c'
+        ))
+
+        fig.update_layout(
+            title='Visit Types Distribution',
+            xaxis_title='Visit Type',
+            yaxis_title='Count',
+            template='plotly_white'
+        )
+    return fig.to_dict()
+
+
+def visit_types_figure(chart_type: str, types_data: Dict[str, List]) -> Dict[str, Any]:
+    if chart_type == "pie":
+        arrays = {"labels": types_data["labels"], "values": types_data["values"]}
+    else:
+        arrays = {"x": types_data["labels"], "y": types_data["values"]}
+    return _fill(_visit_types_template(chart_type), arrays)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _visits_heatmap_template(title: str, hours: Tuple[int, ...], weekdays: Tuple[str, ...]) -> Dict[str, Any]:
+    go = _graph_objects()
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        z=[],
+        x=list(hours),
+        y=list(weekdays),
+        colorscale='Blues',
+        hovertemplate='%{y} %{x}:00<br>Visits: %{z}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Hour of Day',
+        yaxis_title='Weekday',
+        yaxis=dict(autorange='reversed'),
+        template='plotly_white'
+    )
+    return fig.to_dict()
+
+
+def visits_heatmap_figure(title: str, heatmap_data: Dict[str, Any], matrix: List[List[int]]) -> Dict[str, Any]:
+    template = _visits_heatmap_template(title, tuple(heatmap_data["hours"]), tuple(heatmap_data["weekdays"]))
+    return _fill(template, {"z": matrix})
+
+
+def template_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the template caches, keyed by chart"""
+    return {
+        name: {"hits": template.cache_info().hits, "misses": template.cache_info().misses}
+        for name, template in (
+            ("visits_trend", _visits_trend_template),
+            ("visit_types", _visit_types_template),
+            ("visits_heatmap", _visits_heatmap_template),
+        )
+    }
+
+
+def warm_templates(days: int = 30):
+    """Build the default dashboard chart templates (imports Plotly)"""
+    for chart_type in TREND_CHART_TYPES:
+        _visits_trend_template(chart_type, days)
+    for chart_type in VISIT_TYPES_CHART_TYPES:
+        _visit_types_template(chart_type)
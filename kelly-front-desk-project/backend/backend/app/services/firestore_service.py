@@ -1,16 +1,97 @@
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import Dict, List, Any, Optional
+from google.api_core import exceptions as gapi_exceptions
+from google.api_core import retry as retries
+from typing import AsyncIterator, Dict, List, Any, Optional
 import pandas as pd
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
 
+from app import profiling
 from app.config import settings
+from app.services import analytics_engine, metrics
+from app.services.columnar import frame_from_snapshots
+from app.services.local_store import LocalStore
+from app.services.cache import ResultCache, cached
+from app.services.pagination import InvalidPageToken, decode_page_token, encode_page_token
+from app.services.visit_index import VisitIndex, served_from_index
+
+# Firestore timestamp field per collection, normalized to naive UTC on read
+TIMESTAMP_FIELDS = {
+    'visits': 'timestamp',
+    'document-queue': 'submittedAt',
+}
+
+# Collections mirrored by the optional local store
+LOCAL_STORE_COLLECTIONS = ('visits', 'document-queue', 'staff')
+
+# Cached metrics that do not depend on the analytics data version
+VERSION_INDEPENDENT_METRICS = ('data_version', 'collections')
+
+# Minimal visit columns each aggregate needs; passed to select() projections
+TREND_FIELDS = ['timestamp']
+VISIT_TYPE_FIELDS = ['visitType']
+OVERVIEW_FIELDS = ['timestamp', 'visitType']
 
 class FirestoreService:
-    def __init__(self):
-        """Initialize Firestore service with Firebase Admin SDK"""
+    def __init__(self, db=None):
+        """Initialize Firestore service with Firebase Admin SDK
+
+        A single instance is created at startup and shared by every request
+        (see ``app.dependencies.get_firestore_service``). ``db`` can be passed
+        to run the service against an already-built client.
+        """
+        self._owns_client = False
+        self._retry = retries.Retry(
+            initial=settings.firestore_retry_initial,
+            maximum=settings.firestore_retry_maximum,
+            multiplier=settings.firestore_retry_multiplier,
+            timeout=settings.firestore_retry_deadline,
+            predicate=retries.if_exception_type(
+                gapi_exceptions.ServiceUnavailable,
+                gapi_exceptions.DeadlineExceeded,
+                gapi_exceptions.InternalServerError,
+                gapi_exceptions.ResourceExhausted,
+            ),
+        )
+        self._timeout = settings.firestore_query_timeout
+
+        # The Firestore client is synchronous, so every query runs on a
+        # bounded pool; the semaphore makes extra callers wait on the event
+        # loop instead of piling up in the executor queue.
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.firestore_io_workers,
+            thread_name_prefix="firestore-io",
+        )
+        self._io_slots = asyncio.Semaphore(settings.firestore_io_workers)
+
+        self.cache = ResultCache(
+            ttls=settings.cache_ttls,
+            default_ttl=settings.cache_default_ttl,
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+        ) if settings.cache_enabled else None
+        # Last data version handed out; cached aggregates are dropped when it changes
+        self._data_version: Optional[str] = None
+        self.visit_index: Optional[VisitIndex] = None
+        self.local_store: Optional[LocalStore] = (
+            LocalStore(settings.local_store_path) if settings.local_store_path else None
+        )
+        self._local_store_task: Optional[asyncio.Task] = None
+
+        if db is not None:
+            self.db = db
+            return
+
         try:
             # Initialize Firebase Admin (if not already initialized)
             if not firebase_admin._apps:
@@ -28,89 +109,450 @@ class FirestoreService:
                     'projectId': settings.firebase_project_id,
                 })
             
+            # The client opens a single gRPC channel (HTTP/2, keepalive on) on
+            # first use and multiplexes every concurrent call over it
             self.db = firestore.client()
+            self._owns_client = True
             print("✅ Firestore client initialized successfully")
             
         except Exception as e:
             print(f"❌ Error initializing Firestore: {e}")
             raise
 
-    async def test_connection(self) -> List[str]:
-        """Test Firestore connection and return available collections"""
+    def start_visit_index(self):
+        """Start the on_snapshot listeners that keep the in-memory visit index live"""
+        if self.visit_index is None:
+            self.visit_index = VisitIndex(self.db)
+            self.visit_index.start()
+
+    async def resync_visit_index(self):
+        """Reload the visit index from scratch (re-subscribes on the I/O pool)"""
+        await self._run_blocking(self.visit_index.resync)
+
+    def start_local_store_sync(self):
+        """Keep the local mirror current with a periodic incremental sync"""
+        async def sync_forever():
+            while True:
+                try:
+                    await self.sync_local_store()
+                except Exception as e:
+                    print(f"❌ Local store sync failed: {e}")
+                await asyncio.sleep(settings.local_store_sync_interval)
+
+        if self.local_store is not None and self._local_store_task is None:
+            self._local_store_task = asyncio.create_task(sync_forever())
+
+    async def sync_local_store(self, full: bool = False) -> Dict[str, Any]:
+        """Pull new documents into the local mirror
+
+        Timestamped collections only fetch documents at or after their
+        watermark (the boundary is re-read; writes are idempotent). Edits to
+        older documents are therefore only picked up by a ``full`` sync.
+        document-queue entries are removed once processed, so its ids are
+        also reconciled on every sync; staff is small and always copied whole.
+        """
+        store = self.local_store
+        if store is None:
+            raise Exception("Local store is not enabled")
+
+        for collection_name in LOCAL_STORE_COLLECTIONS:
+            timestamp_field = TIMESTAMP_FIELDS.get(collection_name)
+            incremental = timestamp_field is not None and not full
+            if not incremental:
+                await self._run_blocking(store.clear, collection_name)
+
+            since = await self._run_blocking(store.watermark, collection_name) if incremental else None
+            async for page in self.iter_collection_pages(collection_name, start_date=since):
+                await self._run_blocking(store.upsert, collection_name, page)
+
+            if incremental and collection_name == 'document-queue':
+                ids = await self._run_blocking(self._list_ids, collection_name)
+                await self._run_blocking(store.retain, collection_name, ids)
+
+            await self._run_blocking(store.mark_synced, collection_name)
+
+        if self.cache is not None:
+            self.cache.invalidate()
+        return await self._run_blocking(store.status)
+
+    def _local_store_for(self, collection_name: str) -> Optional[LocalStore]:
+        """The local mirror, once it holds a complete copy of the collection"""
+        store = self.local_store
+        if store is not None and store.is_synced(collection_name):
+            return store
+        return None
+
+    def close(self):
+        """Release listeners, the I/O pool and the client's gRPC channel; called from the app shutdown hook"""
+        if self._local_store_task is not None:
+            self._local_store_task.cancel()
+            self._local_store_task = None
+        if self.visit_index is not None:
+            self.visit_index.stop()
+            self.visit_index = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_client:
+            self.db.close()
+            self._owns_client = False
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking Firestore call on the I/O pool without stalling the event loop"""
+        async with self._io_slots:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context so reads are attributed to its endpoint
+            # (and profiled with its request)
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(context.run, profiling.call, func, *args, **kwargs)
+            )
+
+    @staticmethod
+    def _collection_of(query) -> str:
+        """Collection id of a CollectionReference or a query built on one"""
+        collection = query if hasattr(query, 'id') else getattr(query, '_parent', None)
+        return getattr(collection, 'id', None) or 'unknown'
+
+    def _stream(self, query, kind: str = 'stream', collection_name: Optional[str] = None,
+                timeout: Optional[float] = None, retry: bool = True):
+        """``query.stream()`` that records documents read and scan duration once consumed"""
+        collection_name = collection_name or self._collection_of(query)
+        profile = profiling.current()
+        started = time.perf_counter()
+        documents = 0
+        fetching = 0.0
         try:
-            collections = [col.id for col in self.db.collections()]
-            return collections
+            stream = query.stream(retry=self._retry if retry else None, timeout=timeout or self._timeout)
+            if profile is None:
+                for doc in stream:
+                    documents += 1
+                    yield doc
+            else:
+                # Only the time spent waiting on Firestore, not the consumer's work per document
+                while True:
+                    fetch_started = time.perf_counter()
+                    doc = next(stream, None)
+                    fetching += time.perf_counter() - fetch_started
+                    if doc is None:
+                        break
+                    documents += 1
+                    yield doc
+        finally:
+            # A query that matches nothing is still billed one read
+            metrics.record_query(collection_name, kind, max(documents, 1), time.perf_counter() - started)
+            if profile is not None:
+                profile.record('firestore', fetching)
+
+    @staticmethod
+    def _snapshot_record(doc, timestamp_field: Optional[str] = None) -> Dict:
+        doc_data = doc.to_dict()
+        doc_data['id'] = doc.id
+
+        # Convert Firestore timestamp to datetime
+        if timestamp_field and doc_data.get(timestamp_field):
+            doc_data[timestamp_field] = doc_data[timestamp_field].replace(tzinfo=None)
+
+        return doc_data
+
+    def _stream_records(self, query, timestamp_field: Optional[str] = None) -> List[Dict]:
+        """Consume a query stream into a list of dicts (runs on the I/O pool)"""
+        with profiling.stage('records'):
+            return [
+                self._snapshot_record(doc, timestamp_field)
+                for doc in self._stream(query)
+            ]
+
+    def _stream_frame(self, query, collection_name: str) -> pd.DataFrame:
+        """Consume a query stream into a typed DataFrame (runs on the I/O pool)"""
+        with profiling.stage('dataframe'):
+            return frame_from_snapshots(collection_name, self._stream(query, 'scan', collection_name))
+
+    def _fetch_page(self, query, page_size: int, cursor=None, timestamp_field: Optional[str] = None):
+        """Read one page after ``cursor``; returns (records, last snapshot) (runs on the I/O pool)"""
+        if cursor is not None:
+            query = query.start_after(cursor)
+        snapshots = list(self._stream(query.limit(page_size), 'page'))
+        with profiling.stage('records'):
+            records = [self._snapshot_record(doc, timestamp_field) for doc in snapshots]
+        return records, (snapshots[-1] if snapshots else None)
+
+    @staticmethod
+    def _order_fields(collection_name: str, start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None) -> List[str]:
+        """Fields a paged query is ordered by (and a cursor must carry)"""
+        timestamp_field = TIMESTAMP_FIELDS.get(collection_name)
+        if timestamp_field and (start_date or end_date):
+            # Range filters require ordering on the same field first
+            return [timestamp_field, '__name__']
+        return ['__name__']
+
+    @staticmethod
+    def _project(query, fields: Optional[List[str]] = None):
+        """Apply a select() projection so only the named fields are sent back"""
+        return query.select(fields) if fields else query
+
+    def _ordered_query(self, collection_name: str, start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None, fields: Optional[List[str]] = None):
+        """Collection query with a stable order so it can be paged with cursors"""
+        order_fields = self._order_fields(collection_name, start_date, end_date)
+        if fields:
+            # Cursors are built from the ordering fields, so always fetch them
+            fields = list(fields) + [f for f in order_fields if f != '__name__' and f not in fields]
+
+        query = self._project(self.db.collection(collection_name), fields)
+        timestamp_field = TIMESTAMP_FIELDS.get(collection_name)
+
+        if timestamp_field and start_date:
+            query = query.where(timestamp_field, '>=', start_date)
+        if timestamp_field and end_date:
+            query = query.where(timestamp_field, '<=', end_date)
+
+        for field in order_fields:
+            query = query.order_by(field)
+        return query
+
+    async def iter_collection_pages(self, collection_name: str, start_date: Optional[datetime] = None,
+                                    end_date: Optional[datetime] = None,
+                                    page_size: Optional[int] = None,
+                                    fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict]]:
+        """Yield a collection page by page so callers never hold all of it"""
+        page_size = page_size or settings.export_page_size
+        timestamp_field = TIMESTAMP_FIELDS.get(collection_name)
+        query = self._ordered_query(collection_name, start_date, end_date, fields)
+
+        cursor = None
+        while True:
+            try:
+                records, cursor = await self._run_blocking(
+                    self._fetch_page, query, page_size, cursor, timestamp_field
+                )
+            except Exception as e:
+                raise Exception(f"Error paging collection {collection_name}: {e}")
+            if records:
+                yield records
+            if len(records) < page_size:
+                return
+
+    def _list_ids(self, collection_name: str) -> List[str]:
+        """Document ids only, via a __name__ projection (runs on the I/O pool)"""
+        query = self.db.collection(collection_name).select(['__name__'])
+        return [doc.id for doc in self._stream(query, 'ids')]
+
+    def _list_collections(self) -> List[str]:
+        return [col.id for col in self.db.collections(retry=self._retry, timeout=self._timeout)]
+
+    def _probe(self):
+        """Cheapest round trip: one document id, no retries (runs on the I/O pool)"""
+        query = self.db.collection(settings.health_probe_collection).select(['__name__']).limit(1)
+        for _ in self._stream(query, 'probe', timeout=settings.health_probe_timeout, retry=False):
+            break
+
+    async def probe(self):
+        """Readiness check used by ``ReadinessProbe``; raises if Firestore cannot be reached"""
+        try:
+            await asyncio.wait_for(self._run_blocking(self._probe), timeout=settings.health_probe_timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"Firestore probe timed out after {settings.health_probe_timeout}s")
+
+    @cached("collections")
+    async def get_collection_names(self) -> List[str]:
+        """Root collection ids (enumerates every collection; cached)"""
+        try:
+            return await self._run_blocking(self._list_collections)
         except Exception as e:
-            raise Exception(f"Firestore connection test failed: {e}")
+            raise Exception(f"Error listing collections: {e}")
 
-    async def get_collection_data(self, collection_name: str, limit: Optional[int] = None) -> List[Dict]:
-        """Get all documents from a collection"""
+    async def get_collection_data(self, collection_name: str, limit: Optional[int] = None,
+                                  fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get all documents from a collection (only ``fields`` when given)"""
         try:
-            query = self.db.collection(collection_name)
+            query = self._project(self.db.collection(collection_name), fields)
             if limit:
                 query = query.limit(limit)
             
-            docs = query.stream()
-            return [{'id': doc.id, **doc.to_dict()} for doc in docs]
+            return await self._run_blocking(self._stream_records, query)
         except Exception as e:
             raise Exception(f"Error getting collection {collection_name}: {e}")
 
-    async def get_visits_data(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> pd.DataFrame:
-        """Get visits data as pandas DataFrame with optional date filtering"""
+    async def get_collection_page(self, collection_name: str, page_size: Optional[int] = None,
+                                  page_token: Optional[str] = None, start_date: Optional[datetime] = None,
+                                  end_date: Optional[datetime] = None,
+                                  fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get one page of a collection plus an opaque token for the next one
+
+        Raises InvalidPageToken for tokens that were not issued for this collection.
+        """
+        page_size = max(1, min(page_size or settings.page_size_default, settings.page_size_max))
+        order_fields = self._order_fields(collection_name, start_date, end_date)
+        cursor = None
+        if page_token:
+            cursor = decode_page_token(page_token, collection_name)
+            if list(cursor) != order_fields:
+                raise InvalidPageToken("Page token does not match the requested filters")
+
         try:
-            query = self.db.collection('visits')
+            query = self._ordered_query(collection_name, start_date, end_date, fields)
+            timestamp_field = TIMESTAMP_FIELDS.get(collection_name)
+            (records, _), total_records = await asyncio.gather(
+                # One extra document tells us whether another page exists
+                self._run_blocking(self._fetch_page, query, page_size + 1, cursor, timestamp_field),
+                self.count_documents(
+                    collection_name,
+                    since=start_date if timestamp_field else None,
+                    until=end_date if timestamp_field else None,
+                    field=timestamp_field or 'timestamp'
+                ),
+            )
+        except Exception as e:
+            raise Exception(f"Error getting page of collection {collection_name}: {e}")
+
+        next_page_token = None
+        if len(records) > page_size:
+            records = records[:page_size]
+            last = records[-1]
+            next_page_token = encode_page_token(collection_name, {
+                field: last['id'] if field == '__name__' else last[field] for field in order_fields
+            })
+
+        return {
+            "data": records,
+            "page_size": page_size,
+            "next_page_token": next_page_token,
+            "has_more": next_page_token is not None,
+            "total_records": total_records
+        }
+
+    async def get_visits_data(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                              fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get visits data as pandas DataFrame with optional date filtering and projection"""
+        try:
+            store = self._local_store_for('visits')
+            if store is not None:
+                return await self._run_blocking(store.frame, 'visits', start_date, end_date, fields)
+
+            query = self._project(self.db.collection('visits'), fields)
             
             if start_date:
                 query = query.where('timestamp', '>=', start_date)
             if end_date:
                 query = query.where('timestamp', '<=', end_date)
             
-            docs = query.stream()
-            data = []
-            
-            for doc in docs:
-                doc_data = doc.to_dict()
-                doc_data['id'] = doc.id
-                
-                # Convert Firestore timestamp to datetime
-                if 'timestamp' in doc_data and doc_data['timestamp']:
-                    doc_data['timestamp'] = doc_data['timestamp'].replace(tzinfo=None)
-                
-                data.append(doc_data)
-            
-            return pd.DataFrame(data)
+            return await self._run_blocking(self._stream_frame, query, 'visits')
         except Exception as e:
             raise Exception(f"Error getting visits data: {e}")
 
-    async def get_staff_data(self) -> pd.DataFrame:
+    async def get_staff_data(self, fields: Optional[List[str]] = None) -> pd.DataFrame:
         """Get staff data as pandas DataFrame"""
         try:
-            docs = self.db.collection('staff').stream()
-            data = [{'id': doc.id, **doc.to_dict()} for doc in docs]
-            return pd.DataFrame(data)
+            store = self._local_store_for('staff')
+            if store is not None:
+                return await self._run_blocking(store.frame, 'staff', fields=fields)
+
+            query = self._project(self.db.collection('staff'), fields)
+            return await self._run_blocking(self._stream_frame, query, 'staff')
         except Exception as e:
             raise Exception(f"Error getting staff data: {e}")
 
-    async def get_document_queue_data(self) -> pd.DataFrame:
+    async def get_document_queue_data(self, fields: Optional[List[str]] = None) -> pd.DataFrame:
         """Get document queue data as pandas DataFrame"""
         try:
-            docs = self.db.collection('document-queue').stream()
-            data = []
-            
-            for doc in docs:
-                doc_data = doc.to_dict()
-                doc_data['id'] = doc.id
-                
-                # Convert Firestore timestamp to datetime
-                if 'submittedAt' in doc_data and doc_data['submittedAt']:
-                    doc_data['submittedAt'] = doc_data['submittedAt'].replace(tzinfo=None)
-                
-                data.append(doc_data)
-            
-            return pd.DataFrame(data)
+            store = self._local_store_for('document-queue')
+            if store is not None:
+                return await self._run_blocking(store.frame, 'document-queue', fields=fields)
+
+            query = self._project(self.db.collection('document-queue'), fields)
+            return await self._run_blocking(self._stream_frame, query, 'document-queue')
         except Exception as e:
             raise Exception(f"Error getting document queue data: {e}")
 
+    def _count_query(self, query) -> int:
+        """Count matching documents (runs on the I/O pool)
+
+        Uses a server-side ``count()`` aggregation so only the number comes
+        back over the wire. Clients without aggregation support (e.g. the
+        in-memory fakes used for benchmarks) fall back to streaming.
+        """
+        if hasattr(query, 'count'):
+            started = time.perf_counter()
+            result = query.count(alias='total').get(retry=self._retry, timeout=self._timeout)
+            total = int(result[0][0].value)
+            profile = profiling.current()
+            if profile is not None:
+                profile.record('firestore', time.perf_counter() - started)
+            # Aggregations bill one read per batch of up to 1000 index entries
+            metrics.record_query(self._collection_of(query), 'count', max(1, math.ceil(total / 1000)),
+                                 time.perf_counter() - started)
+            return total
+        return sum(1 for _ in self._stream(query, 'count'))
+
+    async def count_documents(self, collection_name: str, since: Optional[datetime] = None,
+                              field: str = 'timestamp', until: Optional[datetime] = None) -> int:
+        """Count documents in a collection, optionally where ``since <= field <= until``"""
+        try:
+            store = self._local_store_for(collection_name)
+            if store is not None and (field == TIMESTAMP_FIELDS.get(collection_name) or not (since or until)):
+                return await self._run_blocking(store.count, collection_name, since, until)
+
+            query = self.db.collection(collection_name)
+            if since:
+                query = query.where(field, '>=', since)
+            if until:
+                query = query.where(field, '<=', until)
+            return await self._run_blocking(self._count_query, query)
+        except Exception as e:
+            raise Exception(f"Error counting collection {collection_name}: {e}")
+
+    def _latest_timestamp(self, collection_name: str) -> Optional[datetime]:
+        """Newest timestamp in a collection via a one-document ordered read (I/O pool)"""
+        field = TIMESTAMP_FIELDS[collection_name]
+        query = (self.db.collection(collection_name)
+                 .order_by(field, direction=firestore.Query.DESCENDING)
+                 .limit(1))
+        for doc in self._stream(self._project(query, [field]), 'latest', collection_name):
+            return self._snapshot_record(doc, field).get(field)
+        return None
+
+    async def get_data_version(self) -> str:
+        """Opaque token that changes whenever the analytics inputs change
+
+        Free when the visit index is live (its change counter). Otherwise it
+        fingerprints the local mirror's sync state, or Firestore's document
+        counts plus newest timestamps, and is cached for ``data_version``'s TTL.
+
+        Cached aggregates outlive a version (up to their own TTLs), so they are
+        dropped whenever a new version is seen: a body served with a version's
+        ETag is then never computed from older data.
+        """
+        index = self.visit_index
+        if index is not None and not index.stale:
+            version = f"index-{index.epoch}-{index.version}"
+        else:
+            version = await self._stored_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            if self.cache is not None:
+                self.cache.invalidate(keep=VERSION_INDEPENDENT_METRICS)
+        return version
+
+    @cached("data_version")
+    async def _stored_data_version(self) -> str:
+        try:
+            if self.local_store is not None and all(
+                self.local_store.is_synced(name) for name in LOCAL_STORE_COLLECTIONS
+            ):
+                fingerprint = await self._run_blocking(self.local_store.status)
+            else:
+                counts = await asyncio.gather(*(self.count_documents(name) for name in LOCAL_STORE_COLLECTIONS))
+                latest = await asyncio.gather(*(
+                    self._run_blocking(self._latest_timestamp, name) for name in TIMESTAMP_FIELDS
+                ))
+                fingerprint = [counts, [ts.isoformat() if ts else None for ts in latest]]
+            digest = hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+            return f"data-{digest[:16]}"
+        except Exception as e:
+            raise Exception(f"Error getting data version: {e}")
+
+    @served_from_index("summary")
+    @cached("summary")
     async def get_analytics_summary(self) -> Dict[str, Any]:
         """Get basic analytics summary"""
         try:
@@ -119,28 +561,22 @@ class FirestoreService:
             week_ago = today - timedelta(days=7)
             month_ago = today - timedelta(days=30)
 
-            # Get visits data
-            visits_df = await self.get_visits_data()
-            
-            # Calculate basic metrics
-            total_visits = len(visits_df)
-            
-            # Today's visits
-            if not visits_df.empty and 'timestamp' in visits_df.columns:
-                visits_df['date'] = pd.to_datetime(visits_df['timestamp']).dt.date
-                today_visits = len(visits_df[visits_df['date'] == today.date()])
-                week_visits = len(visits_df[visits_df['timestamp'] >= week_ago])
-                month_visits = len(visits_df[visits_df['timestamp'] >= month_ago])
-            else:
-                today_visits = week_visits = month_visits = 0
-
-            # Get document queue data
-            doc_queue_df = await self.get_document_queue_data()
-            pending_documents = len(doc_queue_df)
-
-            # Get staff data
-            staff_df = await self.get_staff_data()
-            total_staff = len(staff_df)
+            # All six counts are independent aggregation queries
+            (
+                total_visits,
+                today_visits,
+                week_visits,
+                month_visits,
+                pending_documents,
+                total_staff,
+            ) = await asyncio.gather(
+                self.count_documents('visits'),
+                self.count_documents('visits', since=today),
+                self.count_documents('visits', since=week_ago),
+                self.count_documents('visits', since=month_ago),
+                self.count_documents('document-queue'),
+                self.count_documents('staff'),
+            )
 
             return {
                 "total_visits": total_visits,
@@ -154,46 +590,85 @@ class FirestoreService:
         except Exception as e:
             raise Exception(f"Error getting analytics summary: {e}")
 
+    @served_from_index("daily_trend")
+    @cached("visits_trend")
     async def get_daily_visits_trend(self, days: int = 30) -> Dict[str, Any]:
         """Get daily visits trend for the last N days"""
         try:
             start_date = datetime.now() - timedelta(days=days)
-            visits_df = await self.get_visits_data(start_date=start_date)
-            
-            if visits_df.empty:
-                return {"dates": [], "visits": []}
-            
-            # Group by date
-            visits_df['date'] = pd.to_datetime(visits_df['timestamp']).dt.date
-            daily_counts = visits_df.groupby('date').size().reset_index(name='count')
-            
-            # Create complete date range
-            date_range = pd.date_range(start=start_date.date(), end=datetime.now().date(), freq='D')
-            complete_df = pd.DataFrame({'date': date_range.date})
-            
-            # Merge with actual data
-            result_df = complete_df.merge(daily_counts, on='date', how='left').fillna(0)
-            
-            return {
-                "dates": [d.strftime('%Y-%m-%d') for d in result_df['date']],
-                "visits": result_df['count'].astype(int).tolist()
-            }
+            visits_df = await self.get_visits_data(start_date=start_date, fields=TREND_FIELDS)
+            with profiling.stage('aggregate'):
+                return analytics_engine.daily_trend(visits_df, days=days)
         except Exception as e:
             raise Exception(f"Error getting daily visits trend: {e}")
 
+    @cached("visits_range")
+    async def get_visits_range_trend(self, start_date: datetime, end_date: datetime,
+                                     granularity: str = 'day') -> Dict[str, Any]:
+        """Visits binned by day, week or month over an arbitrary date range"""
+        try:
+            visits_df = await self.get_visits_data(start_date=start_date, end_date=end_date, fields=TREND_FIELDS)
+            with profiling.stage('aggregate'):
+                return analytics_engine.binned_trend(visits_df, start_date, end_date, granularity)
+        except Exception as e:
+            raise Exception(f"Error getting visits range trend: {e}")
+
+    @served_from_index("visit_types")
+    @cached("visit_types")
     async def get_visit_types_distribution(self) -> Dict[str, Any]:
         """Get distribution of visit types"""
         try:
-            visits_df = await self.get_visits_data()
-            
-            if visits_df.empty or 'visitType' not in visits_df.columns:
-                return {"labels": [], "values": []}
-            
-            type_counts = visits_df['visitType'].value_counts()
-            
-            return {
-                "labels": type_counts.index.tolist(),
-                "values": type_counts.values.tolist()
-            }
+            visits_df = await self.get_visits_data(fields=VISIT_TYPE_FIELDS)
+            with profiling.stage('aggregate'):
+                return analytics_engine.visit_types_distribution(visits_df)
+        except Exception as e:
+            raise Exception(f"Error getting visit types distribution: {e}")
+
+    @served_from_index("heatmap")
+    @cached("heatmap")
+    async def get_visits_heatmap(self, days: int = 90) -> Dict[str, Any]:
+        """Visits per weekday x hour over the last N days, with per-type breakdowns"""
+        try:
+            start_date = datetime.now() - timedelta(days=days)
+            visits_df = await self.get_visits_data(start_date=start_date, fields=OVERVIEW_FIELDS)
+            with profiling.stage('aggregate'):
+                return analytics_engine.hour_weekday_heatmap(visits_df, days=days)
+        except Exception as e:
+            raise Exception(f"Error getting visits heatmap: {e}")
+
+    async def get_real_time_stats(self) -> Dict[str, Any]:
+        """Summary plus calculated metrics for live dashboards"""
+        summary = await self.get_analytics_summary()
+        return analytics_engine.real_time_stats(summary)
+
+    @served_from_index("visits_overview")
+    @cached("visits_overview")
+    async def get_visits_overview(self, days: int = 30) -> Dict[str, Any]:
+        """Summary, daily trend and visit types from a single visits scan
+
+        The visits frame is fetched once while the queue and staff counts run
+        concurrently alongside it.
+        """
+        try:
+            visits_df, pending_documents, total_staff = await asyncio.gather(
+                self.get_visits_data(fields=OVERVIEW_FIELDS),
+                self.count_documents('document-queue'),
+                self.count_documents('staff'),
+            )
+
+            now = datetime.now()
+            with profiling.stage('aggregate'):
+                summary = analytics_engine.summarize_visits(visits_df, now=now)
+                summary.update({
+                    "pending_documents": pending_documents,
+                    "total_staff": total_staff,
+                    "last_updated": now.isoformat()
+                })
+
+                return {
+                    "summary": summary,
+                    "daily_trend": analytics_engine.daily_trend(visits_df, days=days, now=now),
+                    "visit_types": analytics_engine.visit_types_distribution(visits_df)
+                }
         except Exception as e:
-            raise Exception(f"Error getting visit types distribution: {e}")
\ No newline at end of file
+            raise Exception(f"Error getting visits overview: {e}")
@@ -0,0 +1,98 @@
+"""Cached readiness probe behind /readyz and /health
+
+Health checkers poll often, so requests never touch Firestore directly:
+a background task runs one cheap probe (a single document id) every
+``interval`` seconds and requests read its last result. Concurrent
+refreshes share one in-flight probe. The service is ready while the last
+probe succeeded and is at most ``max_age`` seconds old.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services import metrics
+
+
+class ReadinessProbe:
+    def __init__(self, probe: Callable[[], Awaitable[Any]], interval: float = 30.0, max_age: float = 90.0):
+        self.probe = probe
+        self.interval = interval
+        self.max_age = max_age
+        self.last_checked_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        self.last_success_monotonic: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background refresh loop (needs a running event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        for task in (self._task, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._inflight = None
+
+    async def refresh(self):
+        """Run a probe now, or wait for the one already in flight"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = metrics.create_background_task(self._check())
+        # A cancelled caller must not cancel the probe other callers share
+        await asyncio.shield(self._inflight)
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    async def _check(self):
+        started = time.perf_counter()
+        try:
+            await self.probe()
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            self.consecutive_failures += 1
+            if self.consecutive_failures == 1:
+                print(f"⚠️ Readiness probe failed: {self.last_error}")
+        else:
+            if self.consecutive_failures:
+                print(f"✅ Readiness probe recovered after {self.consecutive_failures} failures")
+            self.last_error = None
+            self.consecutive_failures = 0
+            self.last_success_at = datetime.now()
+            self.last_success_monotonic = time.monotonic()
+        finally:
+            self.last_latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.last_checked_at = datetime.now()
+
+    @property
+    def ready(self) -> bool:
+        if self.last_error is not None or self.last_success_monotonic is None:
+            return False
+        return time.monotonic() - self.last_success_monotonic <= self.max_age
+
+    async def status(self) -> Dict[str, Any]:
+        """Last probe result; probes first if nothing has been checked yet"""
+        if self.last_checked_at is None:
+            await self.refresh()
+        age = time.monotonic() - self.last_success_monotonic if self.last_success_monotonic else None
+        return {
+            "ready": self.ready,
+            "probe_latency_ms": self.last_latency_ms,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "seconds_since_success": round(age, 3) if age is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.last_error,
+            "refresh_interval": self.interval,
+        }
@@ -0,0 +1,201 @@
+"""Local SQLite mirror of the Firestore collections used for analytics
+
+Documents are stored as JSON alongside promoted columns (``ts`` as epoch
+microseconds of the collection's timestamp field, ``kind`` for its
+category field), so the aggregates can read narrow columns in bulk
+instead of scanning Firestore. ``FirestoreService.sync_local_store`` keeps
+it current from a per-collection watermark.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from app.services.columnar import SCHEMAS, ColumnarFrameBuilder
+
+_EPOCH = datetime(1970, 1, 1)
+
+# collection -> (timestamp field, category field) promoted to columns
+PROMOTED_FIELDS = {
+    'visits': ('timestamp', 'visitType'),
+    'document-queue': ('submittedAt', 'status'),
+    'staff': (None, None),
+}
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    ts INTEGER,
+    kind TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS documents_collection_ts ON documents (collection, ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    watermark INTEGER,
+    synced_at TEXT NOT NULL,
+    documents INTEGER NOT NULL
+);
+"""
+
+
+def _to_micros(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: Optional[int]) -> Optional[datetime]:
+    return _EPOCH + timedelta(microseconds=value) if value is not None else None
+
+
+class LocalStore:
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # SQLite allows one writer; serialize writes from the I/O pool threads
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA_SQL)
+            # Kept in memory so the event loop can check it without a query
+            self._synced = {row[0] for row in conn.execute("SELECT collection FROM sync_state")}
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Writes (called from the I/O pool)
+
+    def upsert(self, collection: str, records: Iterable[Dict[str, Any]]):
+        ts_field, kind_field = PROMOTED_FIELDS.get(collection, (None, None))
+        rows = []
+        for record in records:
+            data = {key: value for key, value in record.items() if key != 'id'}
+            rows.append((
+                collection,
+                record['id'],
+                _to_micros(data.get(ts_field)) if ts_field else None,
+                str(data[kind_field]) if kind_field and data.get(kind_field) is not None else None,
+                json.dumps(data, default=_json_default),
+            ))
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO documents (collection, id, ts, kind, data) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def retain(self, collection: str, ids: Iterable[str]):
+        """Delete mirrored documents that are no longer in Firestore"""
+        with self._write_lock, self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM keep_ids")
+            conn.executemany("INSERT OR IGNORE INTO keep_ids (id) VALUES (?)", ((i,) for i in ids))
+            conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id NOT IN (SELECT id FROM keep_ids)",
+                (collection,)
+            )
+
+    def clear(self, collection: str):
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            conn.execute("DELETE FROM sync_state WHERE collection = ?", (collection,))
+            self._synced.discard(collection)
+
+    def mark_synced(self, collection: str):
+        """Record the sync time and advance the watermark to the newest mirrored timestamp"""
+        with self._write_lock, self._connect() as conn:
+            watermark, documents = conn.execute(
+                "SELECT MAX(ts), COUNT(*) FROM documents WHERE collection = ?", (collection,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (collection, watermark, synced_at, documents) VALUES (?, ?, ?, ?)",
+                (collection, watermark, datetime.now().isoformat(), documents)
+            )
+        self._synced.add(collection)
+
+    # Reads
+
+    def watermark(self, collection: str) -> Optional[datetime]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT watermark FROM sync_state WHERE collection = ?", (collection,)).fetchone()
+        return _from_micros(row[0]) if row else None
+
+    def is_synced(self, collection: str) -> bool:
+        """Whether the collection has been mirrored; answered from memory, safe on the event loop"""
+        return collection in self._synced
+
+    def _where(self, collection: str, start: Optional[datetime], end: Optional[datetime]):
+        clauses, params = ["collection = ?"], [collection]
+        if start:
+            clauses.append("ts >= ?")
+            params.append(_to_micros(start))
+        if end:
+            clauses.append("ts <= ?")
+            params.append(_to_micros(end))
+        return " AND ".join(clauses), params
+
+    def count(self, collection: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        where, params = self._where(collection, start, end)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0]
+
+    def frame(self, collection: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read a collection (or a time range of it) as a typed DataFrame
+
+        When only promoted fields are requested the JSON payload is not
+        touched at all; the narrow columns are read in bulk.
+        """
+        ts_field, kind_field = PROMOTED_FIELDS.get(collection, (None, None))
+        where, params = self._where(collection, start, end)
+
+        with self._connect() as conn:
+            if fields and set(fields) <= {ts_field, kind_field} - {None}:
+                rows = pd.read_sql_query(f"SELECT id, ts, kind FROM documents WHERE {where}", conn, params=params)
+                frame = {}
+                if ts_field in fields:
+                    frame[ts_field] = pd.to_datetime(rows['ts'], unit='us')
+                if kind_field in fields:
+                    frame[kind_field] = pd.Categorical(rows['kind'])
+                frame['id'] = rows['id']
+                return pd.DataFrame(frame)
+
+            builder = ColumnarFrameBuilder(SCHEMAS.get(collection))
+            for doc_id, data in conn.execute(f"SELECT id, data FROM documents WHERE {where}", params):
+                record = json.loads(data)
+                if fields:
+                    record = {key: record.get(key) for key in fields}
+                builder.append(doc_id, record)
+        return builder.build()
+
+    def status(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT collection, watermark, synced_at, documents FROM sync_state").fetchall()
+        return {
+            collection: {
+                "watermark": _from_micros(watermark).isoformat() if watermark is not None else None,
+                "synced_at": synced_at,
+                "documents": documents,
+            }
+            for collection, watermark, synced_at, documents in rows
+        }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).isoformat()
+    return str(value)
@@ -0,0 +1,254 @@
+"""Prometheus-style metrics: a small in-process registry plus HTTP middleware
+
+Counters, gauges and histograms are thread-safe because Firestore reads
+are recorded from the I/O pool threads. ``MetricsMiddleware`` times every
+HTTP request and stores its scope in a context variable, so reads made
+while serving it are attributed to the route the router matched (the I/O pool
+runs calls inside a copy of the caller's context). Reads made outside a
+request (local store sync, the stats stream producer, report jobs) are
+labelled ``background``, including those of tasks that a request starts
+through ``create_background_task``; visit index listener reads are labelled
+``visit_index``.
+"""
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# ASGI scope of the HTTP request being served in this context, if any
+_current_scope: contextvars.ContextVar[Optional[Scope]] = contextvars.ContextVar("current_scope", default=None)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency including the streamed body", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)))
+FIRESTORE_DOCUMENTS = REGISTRY.register(Counter(
+    "firestore_documents_read_total",
+    "Billed Firestore document reads (count() aggregations bill one per 1000 matches)",
+    ("collection", "endpoint")))
+FIRESTORE_QUERIES = REGISTRY.register(Counter(
+    "firestore_queries_total", "Firestore queries by kind", ("collection", "endpoint", "kind")))
+FIRESTORE_DURATION = REGISTRY.register(Histogram(
+    "firestore_query_duration_seconds", "Firestore query/scan duration until the stream is consumed",
+    ("collection", "kind")))
+
+
+def route_template(scope: Scope) -> Optional[str]:
+    """Full path template (e.g. ``/api/v1/reports/jobs/{job_id}``) of the route that served a request
+
+    The router stores the matched route in the scope; for routes of an
+    included router its ``path`` is relative to the router prefix, so the
+    prefix is taken from the concrete path (one segment per template segment).
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return None
+    segments = path.count("/")
+    prefix = "/".join(scope["path"].split("/")[:-segments]) if segments else ""
+    return prefix + path
+
+
+def current_endpoint() -> str:
+    """Route template of the request being served, or ``background``"""
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    return route_template(scope) or "unmatched"
+
+
+def create_background_task(coro) -> asyncio.Task:
+    """``asyncio.create_task`` outside the current request's scope
+
+    A task copies the context it is created in, so one started while
+    serving a request would otherwise attribute its reads to that route
+    for as long as it runs.
+    """
+    context = contextvars.copy_context()
+    context.run(_current_scope.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+def record_query(collection: str, kind: str, documents: int, seconds: float, endpoint: Optional[str] = None):
+    endpoint = endpoint or current_endpoint()
+    FIRESTORE_QUERIES.inc(collection=collection, endpoint=endpoint, kind=kind)
+    FIRESTORE_DOCUMENTS.inc(documents, collection=collection, endpoint=endpoint)
+    FIRESTORE_DURATION.observe(seconds, collection=collection, kind=kind)
+
+
+def record_documents(collection: str, documents: int, endpoint: str):
+    """Reads that do not come from a query, e.g. listener snapshots"""
+    FIRESTORE_DOCUMENTS.inc(documents, collection=collection, endpoint=endpoint)
+
+
+def render_cache_stats(name: str, stats: Dict[str, Dict[str, float]]) -> str:
+    """Exposition lines for per-metric cache counters (``{metric: {hits, misses, ...}}``)"""
+    lines = [
+        f"# HELP {name}_lookups_total Cache lookups by outcome",
+        f"# TYPE {name}_lookups_total counter",
+    ]
+    for metric, counters in sorted(stats.items()):
+        for outcome in ("hits", "misses", "coalesced"):
+            if outcome in counters:
+                labels = _format_labels(("metric", "outcome"), (metric, outcome))
+                lines.append(f"{name}_lookups_total{labels} {counters[outcome]}")
+    lines += [f"# HELP {name}_hit_ratio Share of lookups served without recomputing",
+              f"# TYPE {name}_hit_ratio gauge"]
+    for metric, counters in sorted(stats.items()):
+        lookups = sum(counters.get(outcome, 0) for outcome in ("hits", "misses", "coalesced"))
+        ratio = (counters.get("hits", 0) + counters.get("coalesced", 0)) / lookups if lookups else 0.0
+        lines.append(f"{name}_hit_ratio{_format_labels(('metric',), (metric,))} {_format_value(round(ratio, 4))}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_scope.set(scope)
+        HTTP_IN_FLIGHT.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route is only known once the router has matched it
+            route = route_template(scope) or "unmatched"
+            HTTP_IN_FLIGHT.dec(method=method)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            _current_scope.reset(token)
@@ -0,0 +1,46 @@
+"""Opaque page tokens for cursor-based pagination
+
+A token carries the ordering values of the last document on a page (for
+example ``timestamp`` and ``__name__``) so the next page can be requested
+with ``start_after`` instead of an offset.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_page_token(collection_name: str, cursor: Dict[str, Any]) -> str:
+    payload = {"c": collection_name, "k": {key: _encode_value(value) for key, value in cursor.items()}}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: str, collection_name: str) -> Dict[str, Any]:
+    """Return the cursor values, or raise InvalidPageToken"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["c"] != collection_name:
+            raise InvalidPageToken("Page token belongs to a different collection")
+        return {key: _decode_value(value) for key, value in payload["k"].items()}
+    except InvalidPageToken:
+        raise
+    except Exception:
+        raise InvalidPageToken("Malformed page token")
@@ -0,0 +1,248 @@
+"""Background report jobs rendered in a process pool
+
+A job fetches its collection page by page on the event loop, spools the
+pages to a pickle file, and hands the file to a worker process that
+renders the xlsx/pdf artifact. Artifacts live in a size-capped directory
+private to this process; an identical request made within ``ttl`` seconds
+of a finished job reuses its artifact instead of rendering again. Jobs
+that finished more than ``ttl`` seconds ago are forgotten, and their
+artifacts deleted, on the next submit or status call.
+
+This module is imported by the spawned worker processes, so it must not
+import Firestore or anything else expensive at module level.
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.services import exporters, metrics
+
+# format -> (builder, media type, file extension)
+RENDERERS = {
+    "excel": (exporters.XlsxBuilder, exporters.XLSX_MEDIA_TYPE, "xlsx"),
+    "pdf": (exporters.PdfBuilder, exporters.PDF_MEDIA_TYPE, "pdf"),
+}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def render_report(format: str, title: str, source_path: str, artifact_path: str) -> int:
+    """Worker-process entry point: render spooled pages into an artifact; returns the row count"""
+    builder_class, _, _ = RENDERERS[format]
+    with open(source_path, 'rb') as source:
+        builder = exporters.build_from_spool(
+            lambda fieldnames: builder_class(title, fieldnames=fieldnames), source
+        )
+    output = builder.finish()
+    try:
+        with open(artifact_path, 'wb') as artifact:
+            shutil.copyfileobj(output, artifact)
+    finally:
+        output.close()
+    return builder.rows
+
+
+class ReportJob:
+    def __init__(self, key: str, report_type: str, format: str, collection: str, filters: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.report_type = report_type
+        self.format = format
+        self.collection = collection
+        self.filters = filters
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.rows: Optional[int] = None
+        self.artifact_path: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.done = asyncio.Event()
+
+    @property
+    def media_type(self) -> str:
+        return RENDERERS[self.format][1]
+
+    @property
+    def filename(self) -> str:
+        extension = RENDERERS[self.format][2]
+        return f"{self.report_type}_report_{self.created_at.strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+    @property
+    def available(self) -> bool:
+        return self.status == DONE and self.artifact_path is not None and os.path.exists(self.artifact_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        status = self.status
+        if status == DONE and not self.available:
+            status = "expired"
+        return {
+            "job_id": self.id,
+            "status": status,
+            "report_type": self.report_type,
+            "format": self.format,
+            "rows": self.rows,
+            "size_bytes": os.path.getsize(self.artifact_path) if self.available else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ReportJobManager:
+    def __init__(self, firestore_service, artifact_dir: str = "", max_bytes: int = 512 * 1024 * 1024,
+                 ttl: float = 600.0, workers: int = 2):
+        self.firestore_service = firestore_service
+        # One directory per process: other workers sharing ``artifact_dir``
+        # keep their artifacts and in-flight spools
+        if artifact_dir:
+            os.makedirs(artifact_dir, exist_ok=True)
+        self.artifact_dir = tempfile.mkdtemp(prefix="kelly-report-artifacts-", dir=artifact_dir or None)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.workers = workers
+        self._jobs: Dict[str, ReportJob] = {}
+        self._by_key: Dict[str, ReportJob] = {}
+        self._tasks = set()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Spawned (not forked) workers: the parent holds gRPC threads that must not be forked
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @staticmethod
+    def request_key(report_type: str, format: str, collection: str, filters: Dict[str, Any]) -> str:
+        raw = json.dumps([report_type, format, collection, filters], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def submit(self, report_type: str, format: str, collection: str, filters: Dict[str, Any]) -> ReportJob:
+        """Start a render job, or return the live/fresh job for an identical request"""
+        if format not in RENDERERS:
+            raise ValueError(f"Unsupported report format: {format}")
+
+        self._evict_expired()
+        key = self.request_key(report_type, format, collection, filters)
+        existing = self._by_key.get(key)
+        if existing is not None:
+            if existing.status in (QUEUED, RUNNING):
+                return existing
+            if existing.available and time.monotonic() - existing.finished_monotonic < self.ttl:
+                return existing
+            self._forget(existing)
+
+        job = ReportJob(key, report_type, format, collection, filters)
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        task = metrics.create_background_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> ReportJob:
+        """Raises KeyError for unknown (or already forgotten) jobs"""
+        return self._jobs[job_id]
+
+    async def wait(self, job_id: str, timeout: Optional[float]) -> ReportJob:
+        """Wait up to ``timeout`` seconds (None: until done) for a job to finish and return it either way"""
+        job = self.get(job_id)
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def _run(self, job: ReportJob):
+        source_path = os.path.join(self.artifact_dir, f"{job.id}.pages")
+        artifact_path = os.path.join(self.artifact_dir, f"{job.id}.{RENDERERS[job.format][2]}")
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        try:
+            with open(source_path, 'wb') as source:
+                async for page in self.firestore_service.iter_collection_pages(job.collection, **job.filters):
+                    await asyncio.to_thread(exporters.spool_page, source, page)
+
+            loop = asyncio.get_running_loop()
+            job.rows = await loop.run_in_executor(
+                self.executor, render_report, job.format, f"{job.report_type} report", source_path, artifact_path
+            )
+            job.artifact_path = artifact_path
+            job.status = DONE
+            self._enforce_size_limit(keep=job)
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            print(f"❌ Report job {job.id} failed: {e}")
+            if os.path.exists(artifact_path):
+                os.remove(artifact_path)
+        finally:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+            job.finished_at = datetime.now()
+            job.finished_monotonic = time.monotonic()
+            job.done.set()
+
+    def _forget(self, job: ReportJob):
+        self._jobs.pop(job.id, None)
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        if job.artifact_path and os.path.exists(job.artifact_path):
+            os.remove(job.artifact_path)
+
+    def _evict_expired(self):
+        """Forget finished jobs older than ``ttl`` and delete their artifacts"""
+        cutoff = time.monotonic() - self.ttl
+        for job in [job for job in self._jobs.values() if job.done.is_set() and job.finished_monotonic < cutoff]:
+            self._forget(job)
+
+    def _enforce_size_limit(self, keep: ReportJob):
+        """Drop the least recently finished artifacts (never ``keep``) until they fit ``max_bytes``"""
+        finished: List[ReportJob] = sorted(
+            (job for job in self._jobs.values() if job.available and job is not keep),
+            key=lambda job: job.finished_monotonic or 0.0
+        )
+        total = os.path.getsize(keep.artifact_path) + sum(os.path.getsize(job.artifact_path) for job in finished)
+        for job in finished:
+            if total <= self.max_bytes:
+                break
+            total -= os.path.getsize(job.artifact_path)
+            self._forget(job)
+
+    def status(self) -> Dict[str, Any]:
+        self._evict_expired()
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            state = job.to_dict()["status"]
+            counts[state] = counts.get(state, 0) + 1
+        artifacts = [job for job in self._jobs.values() if job.available]
+        return {
+            "jobs": counts,
+            "artifacts": len(artifacts),
+            "artifact_bytes": sum(os.path.getsize(job.artifact_path) for job in artifacts),
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "workers": self.workers,
+        }
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        shutil.rmtree(self.artifact_dir, ignore_errors=True)
@@ -0,0 +1,88 @@
+"""Fan-out of real-time dashboard stats to streaming clients
+
+One producer task computes the payload per tick (or as soon as a change is
+signalled through ``notify``) and hands the same result to every connected
+client, so N open dashboards cost one computation instead of N polls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.services import metrics
+
+
+class StatsBroadcaster:
+    def __init__(self, compute: Callable[[], Awaitable[Dict[str, Any]]],
+                 interval: float = 5.0, queue_size: int = 2):
+        self.compute = compute
+        self.interval = interval
+        self.queue_size = queue_size
+
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.latest: Optional[Dict[str, Any]] = None
+        self.dropped = 0
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client; it immediately receives the latest payload if any"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._task = metrics.create_background_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def notify(self):
+        """Signal that the underlying data changed; safe to call from any thread"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribers.clear()
+
+    async def _run(self):
+        while True:
+            try:
+                self.latest = await self.compute()
+                self._publish(self.latest)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error computing streamed stats: {e}")
+
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+
+    def _publish(self, payload: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            # Slow clients only ever need the newest stats: drop what they
+            # have not read yet rather than buffering without bound
+            while queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(payload)
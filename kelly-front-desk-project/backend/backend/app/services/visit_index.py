@@ -0,0 +1,252 @@
+"""Live in-memory index of visits kept current by Firestore listeners
+
+The index subscribes to ``visits``, ``document-queue`` and ``staff`` with
+``on_snapshot``. The first snapshot of each listener is the initial load;
+later snapshots apply adds, modifies and deletes incrementally, so the
+aggregate methods can answer from memory instead of scanning Firestore.
+"""
+import functools
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app import profiling
+from app.services import analytics_engine, metrics
+
+# Collections whose size is tracked; visits are additionally bucketed
+INDEXED_COLLECTIONS = ('visits', 'document-queue', 'staff')
+
+
+class VisitIndex:
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._watches: Dict[str, Any] = {}
+        self._loaded = set()
+        # Called (from listener threads) after each applied snapshot
+        self.change_listeners = []
+        # Bumped on every applied snapshot; with the epoch it versions the index contents
+        self.version = 0
+        self.epoch = time.time_ns()
+        self._reset()
+
+    def _reset(self):
+        # visit id -> (day, hour, visitType) so removals can be undone exactly
+        self._visits: Dict[str, Tuple[Optional[date], Optional[int], Optional[str]]] = {}
+        self._per_day: Counter = Counter()
+        self._per_hour: Counter = Counter()
+        self._per_type: Counter = Counter()
+        # (day, hour, visitType) rollup behind the weekday x hour heatmap
+        self._per_hour_type: Counter = Counter()
+        self._members: Dict[str, set] = {name: set() for name in INDEXED_COLLECTIONS}
+        self._loaded = set()
+        self.last_change_at: Optional[datetime] = None
+        self.last_change_monotonic: Optional[float] = None
+        self.synced_at: Optional[datetime] = None
+
+    # Lifecycle
+
+    def start(self):
+        """Subscribe to all indexed collections (initial load arrives async)"""
+        for name in INDEXED_COLLECTIONS:
+            self._watches[name] = self.db.collection(name).on_snapshot(
+                functools.partial(self._on_snapshot, name)
+            )
+
+    def stop(self):
+        for watch in self._watches.values():
+            watch.unsubscribe()
+        self._watches = {}
+
+    def resync(self):
+        """Drop all state and reload every collection from scratch"""
+        self.stop()
+        with self._lock:
+            self._reset()
+        self.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded.issuperset(INDEXED_COLLECTIONS)
+
+    @property
+    def stale(self) -> bool:
+        """True until the initial load completes or when any listener has died"""
+        if not self.ready:
+            return True
+        return not all(getattr(watch, 'is_active', True) for watch in self._watches.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            age = time.monotonic() - self.last_change_monotonic if self.last_change_monotonic else None
+            return {
+                "ready": self.ready,
+                "stale": self.stale,
+                "listeners": {
+                    name: bool(getattr(watch, 'is_active', True)) for name, watch in self._watches.items()
+                },
+                "documents": {name: len(members) for name, members in self._members.items()},
+                "version": self.version,
+                "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+                "last_change_at": self.last_change_at.isoformat() if self.last_change_at else None,
+                "seconds_since_last_change": round(age, 3) if age is not None else None,
+            }
+
+    # Snapshot handling (runs on the listener threads)
+
+    def _on_snapshot(self, collection_name, docs, changes, read_time):
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self._remove(collection_name, doc.id)
+                else:
+                    # MODIFIED is a remove followed by an add of the new version
+                    self._remove(collection_name, doc.id)
+                    self._add(collection_name, doc.id, doc.to_dict() or {})
+
+            self.version += 1
+            self.last_change_at = datetime.now()
+            self.last_change_monotonic = time.monotonic()
+            if collection_name not in self._loaded:
+                self._loaded.add(collection_name)
+                if self.ready:
+                    self.synced_at = self.last_change_at
+                    print("✅ Visit index loaded from Firestore")
+
+        metrics.record_documents(collection_name, len(changes), endpoint="visit_index")
+
+        for listener in self.change_listeners:
+            listener()
+
+    def _add(self, collection_name: str, doc_id: str, data: Dict[str, Any]):
+        self._members[collection_name].add(doc_id)
+        if collection_name != 'visits':
+            return
+
+        timestamp = data.get('timestamp')
+        day = hour = None
+        if timestamp:
+            timestamp = timestamp.replace(tzinfo=None)
+            day, hour = timestamp.date(), timestamp.hour
+            self._per_day[day] += 1
+            self._per_hour[(day, hour)] += 1
+
+        visit_type = data.get('visitType')
+        if visit_type is not None:
+            self._per_type[visit_type] += 1
+            if day is not None:
+                self._per_hour_type[(day, hour, visit_type)] += 1
+
+        self._visits[doc_id] = (day, hour, visit_type)
+
+    def _remove(self, collection_name: str, doc_id: str):
+        self._members[collection_name].discard(doc_id)
+        if collection_name != 'visits' or doc_id not in self._visits:
+            return
+
+        day, hour, visit_type = self._visits.pop(doc_id)
+        if day is not None:
+            _decrement(self._per_day, day)
+            _decrement(self._per_hour, (day, hour))
+        if visit_type is not None:
+            _decrement(self._per_type, visit_type)
+            if day is not None:
+                _decrement(self._per_hour_type, (day, hour, visit_type))
+
+    # Queries
+
+    def _visits_since(self, start_day: date) -> int:
+        return sum(count for day, count in self._per_day.items() if day >= start_day)
+
+    def summary(self) -> Dict[str, Any]:
+        now = datetime.now()
+        today = now.date()
+        with self._lock:
+            return {
+                "total_visits": len(self._members['visits']),
+                "today_visits": self._visits_since(today),
+                "week_visits": self._visits_since(today - timedelta(days=7)),
+                "month_visits": self._visits_since(today - timedelta(days=30)),
+                "pending_documents": len(self._members['document-queue']),
+                "total_staff": len(self._members['staff']),
+                "last_updated": now.isoformat()
+            }
+
+    def daily_trend(self, days: int = 30) -> Dict[str, Any]:
+        """Visits per day; the window start is resolved to the hour, not the second"""
+        now = datetime.now()
+        start = now - timedelta(days=days)
+        date_range = pd.date_range(start=start.date(), end=now.date(), freq='D')
+        with self._lock:
+            visits = [self._per_day.get(d.date(), 0) for d in date_range]
+            # Only count the first day from the window's start hour onwards
+            visits[0] = sum(self._per_hour.get((start.date(), hour), 0) for hour in range(start.hour, 24))
+        if not any(visits):
+            return {"dates": [], "visits": []}
+        return {"dates": [d.strftime('%Y-%m-%d') for d in date_range], "visits": visits}
+
+    def visit_types(self) -> Dict[str, Any]:
+        with self._lock:
+            type_counts = self._per_type.most_common()
+        return {
+            "labels": [label for label, _ in type_counts],
+            "values": [count for _, count in type_counts]
+        }
+
+    def hourly_counts(self, day: date) -> Dict[int, int]:
+        with self._lock:
+            return {hour: count for (d, hour), count in sorted(self._per_hour.items()) if d == day}
+
+    def heatmap(self, days: int = 90) -> Dict[str, Any]:
+        """Weekday x hour counts from the hourly rollups, window resolved to the hour"""
+        start = datetime.now() - timedelta(days=days)
+        first = (start.date(), start.hour)
+        matrix = np.zeros((len(analytics_engine.WEEKDAYS), 24), dtype=np.int64)
+        by_type: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for (day, hour), count in self._per_hour.items():
+                if (day, hour) >= first:
+                    matrix[day.weekday(), hour] += count
+            for (day, hour, visit_type), count in self._per_hour_type.items():
+                if (day, hour) >= first:
+                    if visit_type not in by_type:
+                        by_type[visit_type] = np.zeros_like(matrix)
+                    by_type[visit_type][day.weekday(), hour] += count
+        return analytics_engine.heatmap_payload(matrix, dict(sorted(by_type.items())), days)
+
+    def visits_overview(self, days: int = 30) -> Dict[str, Any]:
+        return {
+            "summary": self.summary(),
+            "daily_trend": self.daily_trend(days=days),
+            "visit_types": self.visit_types()
+        }
+
+
+def _decrement(counter: Counter, key):
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def served_from_index(index_method: str):
+    """Answer a service method from ``self.visit_index`` while it is live
+
+    Falls through to the wrapped (Firestore-backed) method when the index is
+    disabled, still loading, or one of its listeners has stopped.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            index = getattr(self, "visit_index", None)
+            if index is not None and not index.stale:
+                with profiling.stage('visit_index'):
+                    return getattr(index, index_method)(*args, **kwargs)
+            return await func(self, *args, **kwargs)
+        return wrapper
+    return decorator
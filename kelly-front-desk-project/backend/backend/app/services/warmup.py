@@ -0,0 +1,58 @@
+"""Optional startup warm-up: prime the long-lived aggregates the dashboard asks for
+
+Runs in the background after startup, so the server answers (and /livez
+passes) while it works. Only cache entries whose TTL is at least
+``min_ttl`` are filled: short-lived ones (summary, overview) would mostly
+expire before the first request and only add a burst of Firestore reads.
+Each step fills the result cache the same way a request would, which also
+opens the Firestore channel and loads the pandas code paths the aggregates
+use; chart templates are built on a thread so importing Plotly does not
+block the event loop.
+"""
+import asyncio
+import time
+from typing import Any, Dict
+
+from app.services import figures
+
+
+async def _timed(name: str, coroutine, results: Dict[str, Any]):
+    started = time.perf_counter()
+    try:
+        await coroutine
+        results[name] = {"seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        results[name] = {"seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+
+def _aggregate_steps(firestore_service, days: int, min_ttl: float) -> Dict[str, Any]:
+    """Cached metric -> coroutine factory, for the metrics whose TTL is worth warming"""
+    cache = firestore_service.cache
+    if cache is None:
+        return {}
+    steps = {
+        "visits_trend": lambda: firestore_service.get_daily_visits_trend(days=days),
+        "visit_types": lambda: firestore_service.get_visit_types_distribution(),
+        "heatmap": lambda: firestore_service.get_visits_heatmap(),
+    }
+    return {metric: step for metric, step in steps.items() if cache.ttl_for(metric) >= min_ttl}
+
+
+async def warm_up(firestore_service, days: int = 30, min_ttl: float = 60.0) -> Dict[str, Any]:
+    """Warm long-lived aggregates and chart templates; returns per-step timings (failures reported, not raised)"""
+    results: Dict[str, Any] = {}
+    steps = _aggregate_steps(firestore_service, days, min_ttl)
+
+    async def aggregates():
+        if not steps:
+            return
+        # Seen first, so the service does not drop the warmed entries as
+        # older than the first data version it hands out
+        await _timed("data_version", firestore_service.get_data_version(), results)
+        await asyncio.gather(*(_timed(metric, step(), results) for metric, step in steps.items()))
+
+    await asyncio.gather(
+        aggregates(),
+        _timed("chart_templates", asyncio.to_thread(figures.warm_templates, days), results),
+    )
+    return results
@@ -0,0 +1,102 @@
+"""Startup-time report: import time per module, init phases and the optional warm-up
+
+``app.main`` imports this module first (it only uses the standard library)
+and calls ``startup_report.import_modules()`` before its own imports, so
+the heavy dependencies are imported one at a time and each is charged to
+the first module that pulls it in. The report is printed at startup and
+served from ``/debug/startup``.
+
+    python -m benchmarks.cold_start   # per-module breakdown in fresh processes
+"""
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Imported in this order by import_modules(); times are inclusive of
+# anything not already imported by an earlier entry
+STARTUP_MODULES = (
+    "fastapi",
+    "pydantic_settings",
+    "numpy",
+    "pandas",
+    "orjson",
+    "firebase_admin",
+    "firebase_admin.firestore",
+    "app.config",
+    "app.services.analytics_engine",
+    "app.services.firestore_service",
+    "app.routers.analytics",
+    "app.routers.reports",
+    "app.routers.dashboard",
+)
+
+# Only imported when the endpoints that need them are first used
+LAZY_MODULES = ("plotly", "openpyxl", "reportlab", "pyinstrument")
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since the process started (Linux only; None elsewhere)"""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Field 22 is the start time in clock ticks after boot; the comm field may contain spaces
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            uptime_seconds = float(uptime.read().split()[0])
+        return uptime_seconds - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Interpreter and server start-up before this module was imported
+        self.before_app = _process_age()
+        self.imports: List[Tuple[str, float]] = []
+        self.phases: List[Tuple[str, float]] = []
+        self.warmup: Dict[str, Any] = {"status": "disabled"}
+        self.ready_at: Optional[float] = None
+        self.finished_at: Optional[datetime] = None
+
+    def import_modules(self, modules=STARTUP_MODULES):
+        for name in modules:
+            started = time.perf_counter()
+            importlib.import_module(name)
+            self.imports.append((name, time.perf_counter() - started))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark_ready(self):
+        """The startup hook finished; the app starts serving requests"""
+        self.ready_at = time.perf_counter()
+        self.finished_at = datetime.now()
+
+    def summary(self) -> str:
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.phases]
+        total = (self.ready_at or time.perf_counter()) - self.started
+        return f"app ready {total:.2f}s after import started ({', '.join(parts)})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        ready = (self.ready_at or time.perf_counter()) - self.started
+        return {
+            "process_start_to_app_import_s": round(self.before_app, 3) if self.before_app is not None else None,
+            "app_import_to_ready_s": round(ready, 3),
+            "ready_at": self.finished_at.isoformat() if self.finished_at else None,
+            "imports_s": {name: round(seconds, 4) for name, seconds in self.imports},
+            "phases_s": {name: round(seconds, 4) for name, seconds in self.phases},
+            "lazy_modules_loaded": {name: name in sys.modules for name in LAZY_MODULES},
+            "warmup": self.warmup,
+        }
+
+
+startup_report = StartupReport()
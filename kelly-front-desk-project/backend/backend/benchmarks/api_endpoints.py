@@ -0,0 +1,170 @@
+"""Router endpoint latency, throughput and peak memory against an in-memory Firestore
+
+Runs the real app (routers, middleware, FirestoreService) in-process over
+httpx's ASGI transport, with ``FakeFirestore`` holding synthetic data.
+Per scenario: ``--requests`` sequential requests for latency percentiles,
+the same number spread over ``--concurrency`` clients for throughput, and
+one request under tracemalloc for the peak Python/numpy heap it allocates.
+The result cache is off unless ``--cache`` is given, so every request
+does the full read and aggregation.
+
+    python -m benchmarks.api_endpoints
+    python -m benchmarks.api_endpoints --docs 1000 100000 1000000 --requests 20 --concurrency 8
+    python -m benchmarks.api_endpoints --scenarios summary widgets --index --json results.json
+"""
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import httpx
+
+from app.main import app
+from app.services.firestore_service import FirestoreService
+from benchmarks.fake_firestore import FakeFirestore, generate_datasets
+
+# name -> (method, path, JSON body)
+SCENARIOS = {
+    "summary": ("GET", "/api/v1/analytics/summary", None),
+    "trend": ("GET", "/api/v1/analytics/visits/trend?days=30", None),
+    "types": ("GET", "/api/v1/analytics/visits/types", None),
+    "widgets": ("GET", "/api/v1/dashboard/widgets", None),
+    "trend-chart": ("GET", "/api/v1/dashboard/chart/visits-trend?days=30", None),
+    "daily-summary": ("GET", "/api/v1/reports/daily-summary", None),
+    "export-csv": ("POST", "/api/v1/reports/export", {"collection": "visits", "format": "csv"}),
+    "export-excel": ("POST", "/api/v1/reports/export", {"collection": "visits", "format": "excel"}),
+    "export-json": ("POST", "/api/v1/reports/export", {"collection": "visits", "format": "json"}),
+}
+DEFAULT_SCENARIOS = ["summary", "trend", "widgets", "daily-summary", "export-csv", "export-excel"]
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def request(client: httpx.AsyncClient, scenario: str) -> int:
+    method, path, body = SCENARIOS[scenario]
+    response = await client.request(method, path, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{scenario}: HTTP {response.status_code} {response.text[:200]}")
+    return len(response.content)
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, requests: int, concurrency: int):
+    size = await request(client, scenario)  # warm-up; also checks the endpoint answers 200
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await request(client, scenario)
+        latencies.append(time.perf_counter() - started)
+
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            await request(client, scenario)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    throughput = requests / (time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        await request(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "scenario": scenario,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "throughput_rps": throughput,
+        "concurrency": concurrency,
+        "peak_alloc_mb": peak / 1e6,
+        "response_bytes": size,
+    }
+
+
+async def run_dataset(docs: int, scenarios, requests: int, concurrency: int, cache: bool, index: bool):
+    started = time.perf_counter()
+    db = FakeFirestore(generate_datasets(visits=docs))
+    print(f"\n{docs} visits, {db.document_count('document-queue')} queued documents, "
+          f"{db.document_count('staff')} staff (generated in {time.perf_counter() - started:.1f} s)")
+
+    firestore_service = FirestoreService(db=db)
+    if not cache:
+        firestore_service.cache = None
+    if index:
+        started = time.perf_counter()
+        firestore_service.start_visit_index()
+        print(f"visit index loaded in {time.perf_counter() - started:.1f} s")
+    app.state.firestore_service = firestore_service
+
+    print(f"{'scenario':<16}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          f"{'req/s':>10}{'peak MB':>10}{'body KB':>10}")
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in scenarios:
+                result = await run_scenario(client, scenario, requests, concurrency)
+                result["docs"] = docs
+                results.append(result)
+                print(f"{scenario:<16}{result['p50_ms']:>10.1f}{result['p90_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                      f"{result['max_ms']:>10.1f}{result['throughput_rps']:>10.1f}"
+                      f"{result['peak_alloc_mb']:>10.1f}{result['response_bytes'] / 1024:>10.1f}")
+    finally:
+        firestore_service.close()
+        app.state.firestore_service = None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=DEFAULT_SCENARIOS)
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario and phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--index", action="store_true", help="serve aggregates from the visit index")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    print(f"{args.requests} sequential requests per scenario, then {args.requests} over "
+          f"{args.concurrency} concurrent clients; cache {'on' if args.cache else 'off'}, "
+          f"visit index {'on' if args.index else 'off'}")
+
+    results = []
+    for docs in args.docs:
+        results += asyncio.run(run_dataset(
+            docs, args.scenarios, args.requests, args.concurrency, args.cache, args.index
+        ))
+    print(f"\nprocess peak RSS {peak_rss_mb():.0f} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump({"run_at": datetime.now().isoformat(), "args": vars(args), "results": results},
+                      output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
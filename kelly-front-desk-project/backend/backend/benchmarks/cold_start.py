@@ -0,0 +1,72 @@
+"""Cold-start import cost of app.main, per module, measured in fresh interpreters
+
+Each run is a new ``python -X importtime -c "import app.main"`` process;
+the table shows the median cumulative import time of the slowest modules
+and whether the lazily imported chart/report dependencies stayed unloaded.
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 5 --top 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from app.startup import LAZY_MODULES
+
+PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app.main\n"
+    "print(json.dumps({'seconds': time.perf_counter() - started,\n"
+    "                  'loaded': [name for name in %r if name in sys.modules]}))\n"
+) % (LAZY_MODULES,)
+
+
+def run_once():
+    """(wall seconds, lazily imported modules that got loaded, {module: cumulative us})"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        cumulative[name] = int(cumulative_us)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"], cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    walls = []
+    loaded = set()
+    samples = defaultdict(list)
+    for _ in range(args.runs):
+        seconds, lazy_loaded, cumulative = run_once()
+        walls.append(seconds)
+        loaded.update(lazy_loaded)
+        for name, microseconds in cumulative.items():
+            samples[name].append(microseconds)
+
+    print(f"import app.main: median {statistics.median(walls) * 1000:.0f} ms over {args.runs} fresh processes\n")
+    print(f"{'module':<50}{'cumulative ms':>15}")
+    slowest = sorted(samples.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in slowest[:args.top]:
+        print(f"{name:<50}{statistics.median(values) / 1000:>15.1f}")
+
+    print("\nlazy dependencies loaded at import: " + (", ".join(sorted(loaded)) or "none"))
+
+
+if __name__ == "__main__":
+    main()
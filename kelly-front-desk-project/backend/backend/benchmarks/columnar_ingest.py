@@ -0,0 +1,88 @@
+"""Snapshot -> DataFrame ingestion: legacy dict-per-row path vs ColumnarFrameBuilder
+
+    python -m benchmarks.columnar_ingest
+    python -m benchmarks.columnar_ingest --docs 100000 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from app.services.columnar import frame_from_snapshots
+
+VISIT_TYPES = ["New Hire", "Document Drop-off", "Fingerprints", "Badge Pickup", "Question"]
+
+
+class Snapshot:
+    """Minimal stand-in for a Firestore DocumentSnapshot"""
+    __slots__ = ("id", "_data")
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def make_snapshots(count: int):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Snapshot(f"visit{i:08d}", {
+            "timestamp": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+            "visitType": rng.choice(VISIT_TYPES),
+            "name": f"Visitor {i}",
+            "email": f"visitor{i}@example.com",
+        })
+        for i in range(count)
+    ]
+
+
+def legacy(snapshots) -> pd.DataFrame:
+    data = []
+    for doc in snapshots:
+        doc_data = doc.to_dict()
+        doc_data['id'] = doc.id
+        if 'timestamp' in doc_data and doc_data['timestamp']:
+            doc_data['timestamp'] = doc_data['timestamp'].replace(tzinfo=None)
+        data.append(doc_data)
+    df = pd.DataFrame(data)
+    # Callers re-parsed timestamps before grouping
+    df['date'] = pd.to_datetime(df['timestamp']).dt.date
+    return df
+
+
+def columnar(snapshots) -> pd.DataFrame:
+    df = frame_from_snapshots('visits', snapshots)
+    df['date'] = df['timestamp'].dt.date
+    return df
+
+
+def timed(func, snapshots, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = func(snapshots)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs), df.memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(args.docs)
+    print(f"{args.docs} documents, median of {args.repeat} runs")
+    for name, func in (("legacy", legacy), ("columnar", columnar)):
+        seconds, size = timed(func, snapshots, args.repeat)
+        print(f"{name:<10}{seconds * 1000:>10.1f} ms{size / 1e6:>10.1f} MB frame")
+
+
+if __name__ == "__main__":
+    main()
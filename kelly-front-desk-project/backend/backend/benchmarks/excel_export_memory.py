@@ -0,0 +1,103 @@
+"""Peak RSS of xlsx exports: legacy pandas ExcelWriter vs paged write-only builder
+
+Each (method, rows) pair runs in a fresh subprocess so ru_maxrss reflects
+only that export.
+
+    python -m benchmarks.excel_export_memory
+    python -m benchmarks.excel_export_memory --rows 10000 100000 --methods write_only
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+PAGE_SIZE = 1000
+VISIT_TYPES = ["New Hire", "Document Drop-off", "Fingerprints", "Badge Pickup", "Question"]
+
+
+def synthetic_pages(rows: int, page_size: int = PAGE_SIZE):
+    """Yield pages of visit-shaped records without holding them all"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, rows, page_size):
+        yield [
+            {
+                "timestamp": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+                "visitType": rng.choice(VISIT_TYPES),
+                "name": f"Visitor {i}",
+                "email": f"visitor{i}@example.com",
+                "phone": f"239-555-{i % 10000:04d}",
+                "id": f"visit{i:08d}",
+            }
+            for i in range(offset, min(offset + page_size, rows))
+        ]
+
+
+def run_legacy(rows: int) -> int:
+    import pandas as pd
+
+    data = [record for page in synthetic_pages(rows) for record in page]
+    df = pd.DataFrame(data)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name="visits", index=False)
+    output.seek(0)
+    return len(io.BytesIO(output.read()).getvalue())
+
+
+def run_write_only(rows: int) -> int:
+    from app.services import exporters
+
+    async def pages():
+        for page in synthetic_pages(rows):
+            yield page
+
+    output = asyncio.run(exporters.build_xlsx("visits", pages()))
+    size = exporters.file_size(output)
+    for _ in exporters.iter_file(output):
+        pass
+    return size
+
+
+METHODS = {"legacy": run_legacy, "write_only": run_write_only}
+
+
+def measure(method: str, rows: int):
+    started = time.perf_counter()
+    size = METHODS[method](rows)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"method": method, "rows": rows, "seconds": round(elapsed, 2),
+                      "peak_rss_mb": round(peak_kb / 1024, 1), "file_mb": round(size / 1e6, 2)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--methods", nargs="+", choices=sorted(METHODS), default=sorted(METHODS))
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'method':<12}{'rows':>10}{'seconds':>10}{'peak RSS MB':>14}{'file MB':>10}")
+    for rows in args.rows:
+        for method in args.methods:
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.excel_export_memory", "--child", method, str(rows)],
+                capture_output=True, text=True, check=True
+            )
+            r = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{r['method']:<12}{r['rows']:>10}{r['seconds']:>10}{r['peak_rss_mb']:>14}{r['file_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""In-memory stand-in for the ``firestore.client()`` surface FirestoreService uses, plus synthetic data
+
+Supports ``collection``, ``collections``, ``where``, ``order_by``,
+``start_after``, ``limit``, ``select``, ``stream``, ``add`` and
+``on_snapshot`` (initial snapshot only). There is no ``count()``, so
+counts take the service's streaming fallback. Range filters and cursors
+are resolved with bisect over per-field sorted indexes built on first use,
+so paging through a million documents costs about what the service
+spends, not the fake.
+
+    from benchmarks.fake_firestore import FakeFirestore, generate_datasets
+    db = FakeFirestore(generate_datasets(visits=100_000))
+    service = FirestoreService(db=db)
+"""
+import bisect
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+VISIT_TYPES = ["New Hire", "Document Drop-off", "Fingerprints", "Badge Pickup", "Question"]
+VISIT_TYPE_WEIGHTS = [30, 25, 20, 15, 10]
+DOCUMENT_TYPES = ["I-9", "W-4", "Background Check", "Direct Deposit", "Certification"]
+DOCUMENT_STATUSES = ["pending", "in-review", "approved", "rejected"]
+STAFF_ROLES = ["Recruiter", "Onboarding Specialist", "Front Desk", "Manager"]
+
+# Front desk traffic by hour of day (office hours, lunch dip)
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 4, 9, 11, 10, 8, 6, 8, 10, 9, 6, 3, 1, 0, 0, 0, 0, 0]
+
+# Sorts after every document id, for inclusive upper bounds
+_MAX_ID = "\uffff"
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array-contains": lambda a, b: isinstance(a, list) and b in a,
+}
+_RANGE_OPERATORS = ("<", "<=", ">", ">=")
+
+Datasets = Dict[str, List[Tuple[str, Dict[str, Any]]]]
+
+
+def _normalize(value):
+    """Firestore stores naive datetimes as UTC"""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def generate_datasets(visits: int = 10_000, days: int = 365, seed: int = 7,
+                      now: Optional[datetime] = None) -> Datasets:
+    """``visits``, ``document-queue`` and ``staff`` documents shaped like the front desk app writes them
+
+    Visits are spread over the last ``days`` days with weekday/office-hour
+    traffic; the queue and staff sizes scale with the number of visits.
+    """
+    rng = random.Random(seed)
+    now = (now or datetime.now(timezone.utc)).replace(microsecond=0)
+    today = now.replace(hour=0, minute=0, second=0)
+    staff_count = min(200, max(10, visits // 5000))
+    queue_count = max(20, visits // 20)
+
+    staff = [
+        (f"staff{i:05d}", {
+            "name": f"Staff Member {i}",
+            "email": f"staff{i}@kellyeducation.example",
+            "role": STAFF_ROLES[i % len(STAFF_ROLES)],
+            "active": i % 10 != 0,
+            "createdAt": today - timedelta(days=rng.randint(30, 1500)),
+        })
+        for i in range(staff_count)
+    ]
+
+    def visit_time() -> datetime:
+        while True:
+            day = today - timedelta(days=rng.randrange(days))
+            # Weekends see a tenth of the weekday traffic
+            if day.weekday() < 5 or rng.random() < 0.1:
+                break
+        hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+        timestamp = day + timedelta(hours=hour, seconds=rng.randrange(3600))
+        return timestamp if timestamp <= now else now - timedelta(seconds=rng.randrange(3600))
+
+    visit_types = rng.choices(VISIT_TYPES, weights=VISIT_TYPE_WEIGHTS, k=visits)
+    visit_docs = [
+        (f"visit{i:08d}", {
+            "timestamp": visit_time(),
+            "visitType": visit_types[i],
+            "name": f"Visitor {i}",
+            "email": f"visitor{i}@example.com",
+            "phone": f"239-555-{i % 10000:04d}",
+            "staffId": staff[i % staff_count][0],
+        })
+        for i in range(visits)
+    ]
+
+    queue = [
+        (f"doc{i:07d}", {
+            "submittedAt": now - timedelta(minutes=rng.randrange(days * 24 * 60)),
+            "documentType": rng.choice(DOCUMENT_TYPES),
+            "status": rng.choices(DOCUMENT_STATUSES, weights=[20, 10, 60, 10])[0],
+            "visitorName": f"Visitor {rng.randrange(max(1, visits))}",
+        })
+        for i in range(queue_count)
+    ]
+
+    return {"visits": visit_docs, "document-queue": queue, "staff": staff}
+
+
+class FakeSnapshot:
+    """DocumentSnapshot stand-in; ``to_dict()`` returns a fresh dict like the real client"""
+    __slots__ = ("id", "_data", "exists")
+
+    def __init__(self, doc_id: str, data: Dict[str, Any]):
+        self.id = doc_id
+        self._data = data
+        self.exists = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+    def get(self, field: str):
+        return self._data.get(field)
+
+
+_Change = namedtuple("_Change", "type document")
+_ChangeType = namedtuple("_ChangeType", "name")
+_ADDED = _ChangeType("ADDED")
+
+
+class _Watch:
+    is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class _Store:
+    """One collection's documents plus lazily built sorted indexes"""
+
+    def __init__(self, documents: List[Tuple[str, Dict[str, Any]]]):
+        self.by_id = sorted(documents, key=lambda doc: doc[0])
+        self.id_keys = [(doc_id,) for doc_id, _ in self.by_id]
+        self._indexes: Dict[str, Tuple[List[tuple], List[Tuple[str, Dict[str, Any]]]]] = {}
+
+    def add(self, doc_id: str, data: Dict[str, Any]):
+        position = bisect.bisect_left(self.id_keys, (doc_id,))
+        if position < len(self.by_id) and self.by_id[position][0] == doc_id:
+            self.by_id[position] = (doc_id, data)
+        else:
+            self.by_id.insert(position, (doc_id, data))
+            self.id_keys.insert(position, (doc_id,))
+        self._indexes.clear()
+
+    def index(self, field: str):
+        """(sort keys, documents) ordered by (field, id), documents lacking the field excluded"""
+        if field not in self._indexes:
+            rows = sorted(
+                ((_normalize(data[field]), doc_id), (doc_id, data))
+                for doc_id, data in self.by_id if data.get(field) is not None
+            )
+            self._indexes[field] = ([key for key, _ in rows], [doc for _, doc in rows])
+        return self._indexes[field]
+
+
+class FakeQuery:
+    def __init__(self, store: _Store, parent: "FakeCollection", filters=(), order=(), cursor=None,
+                 limit: Optional[int] = None, fields: Optional[List[str]] = None):
+        self._store = store
+        self._parent = parent
+        self._filters = tuple(filters)
+        self._order = tuple(order)
+        self._cursor = cursor
+        self._limit = limit
+        self._fields = fields
+
+    def _copy(self, **changes) -> "FakeQuery":
+        state = dict(filters=self._filters, order=self._order, cursor=self._cursor,
+                     limit=self._limit, fields=self._fields)
+        state.update(changes)
+        return FakeQuery(self._store, self._parent, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator {op_string!r}")
+        return self._copy(filters=self._filters + ((field_path, op_string, _normalize(value)),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        return self._copy(order=self._order + ((field_path, direction == "DESCENDING"),))
+
+    def start_after(self, document_fields):
+        return self._copy(cursor=document_fields)
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def _plan(self):
+        """Leading sort field (None for document id), direction, and filters left to check per document"""
+        order = [(field, desc) for field, desc in self._order if field != "__name__"]
+        if len(order) > 1:
+            raise NotImplementedError("The fake orders by at most one field plus __name__")
+        if order:
+            field, descending = order[0]
+        else:
+            # Firestore orders implicitly by the inequality field
+            field = next((f for f, op, _ in self._filters if op in _RANGE_OPERATORS), None)
+            descending = any(desc for _, desc in self._order)
+        return field, descending
+
+    def _cursor_key(self, field: Optional[str]) -> tuple:
+        cursor = self._cursor
+        if isinstance(cursor, FakeSnapshot):
+            values = {"__name__": cursor.id, **cursor._data}
+        else:
+            values = dict(cursor)
+        doc_id = values.get("__name__", _MAX_ID)
+        if field is None:
+            return (doc_id,)
+        return (_normalize(values[field]), doc_id)
+
+    def _rows(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        field, descending = self._plan()
+        if field is None:
+            keys, rows = self._store.id_keys, self._store.by_id
+        else:
+            keys, rows = self._store.index(field)
+
+        low, high = 0, len(rows)
+        remaining = []
+        for name, op, value in self._filters:
+            if name == field and op in _RANGE_OPERATORS:
+                if op == ">=":
+                    low = max(low, bisect.bisect_left(keys, (value,)))
+                elif op == ">":
+                    low = max(low, bisect.bisect_right(keys, (value, _MAX_ID)))
+                elif op == "<=":
+                    high = min(high, bisect.bisect_right(keys, (value, _MAX_ID)))
+                else:
+                    high = min(high, bisect.bisect_left(keys, (value,)))
+            else:
+                remaining.append((name, _OPERATORS[op], value))
+
+        if self._cursor is not None:
+            if descending:
+                high = min(high, bisect.bisect_left(keys, self._cursor_key(field)))
+            else:
+                low = max(low, bisect.bisect_right(keys, self._cursor_key(field)))
+
+        positions = range(high - 1, low - 1, -1) if descending else range(low, high)
+        for position in positions:
+            doc_id, data = rows[position]
+            if all(name in data and compare(_normalize(data[name]), value) for name, compare, value in remaining):
+                yield doc_id, data
+
+    def stream(self, retry=None, timeout=None) -> Iterator[FakeSnapshot]:
+        fields = self._fields
+        for count, (doc_id, data) in enumerate(self._rows()):
+            if self._limit is not None and count >= self._limit:
+                return
+            if fields is not None:
+                data = {field: data[field] for field in fields if field in data}
+            yield FakeSnapshot(doc_id, data)
+
+    def get(self, retry=None, timeout=None) -> List[FakeSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, name: str, store: _Store):
+        super().__init__(store, self)
+        self.id = name
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None) -> str:
+        """Write (or overwrite) one document; returns its id. Listeners are not notified"""
+        document_id = document_id or f"added{len(self._store.by_id):08d}"
+        self._store.add(document_id, dict(document_data))
+        return document_id
+
+    def on_snapshot(self, callback) -> _Watch:
+        """Deliver the initial snapshot (every document ADDED) synchronously; no later changes"""
+        docs = [FakeSnapshot(doc_id, data) for doc_id, data in self._store.by_id]
+        callback(docs, [_Change(_ADDED, doc) for doc in docs], datetime.now(timezone.utc))
+        return _Watch()
+
+
+class FakeFirestore:
+    def __init__(self, datasets: Optional[Datasets] = None):
+        self._stores = {name: _Store(documents) for name, documents in (datasets or {}).items()}
+
+    def collection(self, name: str) -> FakeCollection:
+        if name not in self._stores:
+            self._stores[name] = _Store([])
+        return FakeCollection(name, self._stores[name])
+
+    def collections(self, retry=None, timeout=None) -> List[FakeCollection]:
+        return [FakeCollection(name, store) for name, store in self._stores.items() if store.by_id]
+
+    def document_count(self, name: str) -> int:
+        store = self._stores.get(name)
+        return len(store.by_id) if store is not None else 0
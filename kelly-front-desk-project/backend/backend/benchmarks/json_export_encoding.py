@@ -0,0 +1,106 @@
+"""JSON export serialization: FastAPI default encoder vs ORJSONResponse, plus compressed sizes
+
+    python -m benchmarks.json_export_encoding
+    python -m benchmarks.json_export_encoding --rows 50000 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.compression import _Compressor, brotli
+from app.responses import ORJSONResponse
+
+VISIT_TYPES = ["New Hire", "Document Drop-off", "Fingerprints", "Badge Pickup", "Question"]
+
+
+def make_records(count: int):
+    """Visit records shaped like FirestoreService._snapshot_record output"""
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "timestamp": start + timedelta(seconds=rng.randint(0, 365 * 86400)),
+            "visitType": rng.choice(VISIT_TYPES),
+            "name": f"Visitor {i}",
+            "email": f"visitor{i}@example.com",
+            "id": f"visit{i:08d}",
+        }
+        for i in range(count)
+    ]
+
+
+def export_payload(data):
+    return {
+        "collection": "visits",
+        "exported_at": datetime.now().isoformat(),
+        "data": data,
+        "total_records": len(data) if isinstance(data, list) else len(data.index),
+    }
+
+
+def default_records(records) -> bytes:
+    # What FastAPI does with a plain dict return value
+    return JSONResponse(jsonable_encoder(export_payload(records))).body
+
+
+def orjson_records(records) -> bytes:
+    return ORJSONResponse(export_payload(records)).body
+
+
+def default_frame(df) -> bytes:
+    # The old export branch: to_dict('records') then the default encoder
+    return JSONResponse(jsonable_encoder(export_payload(df.to_dict('records')))).body
+
+
+def orjson_frame(df) -> bytes:
+    return ORJSONResponse(export_payload(df)).body
+
+
+def timed(func, data, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(data)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    df = pd.DataFrame(records)
+    df["visitType"] = df["visitType"].astype("category")
+
+    print(f"{args.rows} visit rows, median of {args.repeat} runs")
+    body = None
+    for name, func, data in (
+        ("default (records)", default_records, records),
+        ("orjson (records)", orjson_records, records),
+        ("default (DataFrame)", default_frame, df),
+        ("orjson (DataFrame)", orjson_frame, df),
+    ):
+        seconds, body = timed(func, data, args.repeat)
+        print(f"{name:<22}{seconds * 1000:>10.1f} ms{len(body) / 1e6:>10.2f} MB")
+
+    print("\nCompressed size of the export body")
+    encodings = [("gzip", "gzip")] + ([("br", "brotli")] if brotli is not None else [])
+    for encoding, label in encodings:
+        started = time.perf_counter()
+        compressed = _Compressor(encoding, gzip_level=6, brotli_quality=4).compress(body, more_body=False)
+        seconds = time.perf_counter() - started
+        print(f"{label:<22}{seconds * 1000:>10.1f} ms{len(compressed) / 1e6:>10.2f} MB"
+              f"  ({len(compressed) / len(body):.1%} of raw)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Fixtures wiring FirestoreService and the app to the in-memory FakeFirestore
+
+The app is called over httpx's ASGI transport without its lifespan, so
+tests put the services they need on ``app.state`` themselves.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.firestore_service import FirestoreService
+from app.services.report_jobs import ReportJobManager
+from benchmarks.fake_firestore import FakeFirestore, generate_datasets
+
+
+@pytest.fixture
+def db():
+    return FakeFirestore(generate_datasets(visits=500, days=60, seed=3))
+
+
+@pytest.fixture
+def service(db):
+    service = FirestoreService(db=db)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def api(tmp_path):
+    """``api(service)`` returns an AsyncClient for the app backed by ``service``"""
+    managers = []
+
+    def client(service: FirestoreService) -> httpx.AsyncClient:
+        app.state.firestore_service = service
+        app.state.report_jobs = ReportJobManager(service, artifact_dir=str(tmp_path / "artifacts"))
+        managers.append(app.state.report_jobs)
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    yield client
+    for manager in managers:
+        asyncio.run(manager.close())
+    app.state.firestore_service = None
+    app.state.report_jobs = None
@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.analytics import BatchRequest
+from app.services.batch import resolve_batch
+
+
+def _resolve(service, metrics):
+    return asyncio.run(resolve_batch(service, BatchRequest(metrics=metrics).metrics, max_days=400))
+
+
+def test_summary_metrics_use_counts_not_a_full_scan(service):
+    before = datetime.now()
+    batch = _resolve(service, [{"metric": "summary"}, {"metric": "real-time-stats"}, {"metric": "trend", "days": 7}])
+
+    assert batch["plan"]["from_counts"] == ["summary", "real-time-stats"]
+    read = batch["plan"]["visits_read"]
+    assert read["fields"] == ["timestamp"]
+    assert datetime.fromisoformat(read["start_date"]) >= before - timedelta(days=7)
+
+
+def test_summary_only_batch_reads_no_visits(service):
+    batch = _resolve(service, [{"metric": "summary"}])
+
+    assert batch["plan"]["visits_read"] is None
+
+
+def test_batch_results_match_the_individual_endpoints(service):
+    batch = _resolve(service, [{"metric": "summary"}, {"metric": "real-time-stats"}, {"metric": "types"}])
+
+    assert batch["results"]["summary"] == asyncio.run(service.get_analytics_summary())
+    assert batch["results"]["real-time-stats"] == asyncio.run(service.get_real_time_stats())
+    assert batch["results"]["types"] == asyncio.run(service.get_visit_types_distribution())
@@ -0,0 +1,178 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import ResultCache
+from benchmarks.fake_firestore import FakeQuery
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_their_metric_ttl(clock):
+    cache = ResultCache(ttls={"summary": 15.0}, default_ttl=60.0)
+    calls = []
+
+    async def compute():
+        calls.append(clock.now)
+        return len(calls)
+
+    async def scenario():
+        assert await cache.get_or_compute("summary", "k", compute) == 1
+        clock.now += 14.9
+        assert await cache.get_or_compute("summary", "k", compute) == 1
+        clock.now += 0.2
+        assert await cache.get_or_compute("summary", "k", compute) == 2
+
+    asyncio.run(scenario())
+    assert cache.stats()["metrics"]["summary"]["hits"] == 1
+    assert cache.stats()["metrics"]["summary"]["misses"] == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"total": 42}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("summary", "k", compute) for _ in range(50)))
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [{"total": 42}] * 50
+    assert cache.stats()["metrics"]["summary"]["coalesced"] == 49
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = ResultCache()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("firestore unavailable")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache.get_or_compute("summary", "k", failing) for _ in range(5)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("summary", "k", failing)
+
+    asyncio.run(scenario())
+    assert calls == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2)
+
+    async def scenario():
+        for key in ("a", "b"):
+            await cache.get_or_compute("trend", key, lambda: asyncio.sleep(0, key))
+        await cache.get_or_compute("trend", "a", lambda: asyncio.sleep(0, "a"))
+        await cache.get_or_compute("trend", "c", lambda: asyncio.sleep(0, "c"))
+
+    asyncio.run(scenario())
+    assert set(cache._entries) == {("trend", "a"), ("trend", "c")}
+    assert cache.stats()["metrics"]["trend"]["evictions"] == 1
+
+
+def test_polling_burst_costs_one_set_of_reads(monkeypatch, service):
+    streams = 0
+    original_stream = FakeQuery.stream
+
+    def counting_stream(self, retry=None, timeout=None):
+        nonlocal streams
+        streams += 1
+        yield from original_stream(self, retry, timeout)
+
+    monkeypatch.setattr(FakeQuery, "stream", counting_stream)
+
+    async def scenario():
+        return await asyncio.gather(*(service.get_analytics_summary() for _ in range(50)))
+
+    summaries = asyncio.run(scenario())
+    # One summary is six counts
+    assert streams == 6
+    assert all(summary == summaries[0] for summary in summaries)
+
+
+def test_invalidate_discards_computations_in_flight():
+    cache = ResultCache()
+    release = None
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        value = calls
+        await release.wait()
+        return value
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        stale = asyncio.create_task(cache.get_or_compute("summary", "k", compute))
+        await asyncio.sleep(0)
+        cache.invalidate(keep=("data_version",))
+        fresh = asyncio.create_task(cache.get_or_compute("summary", "k", compute))
+        await asyncio.sleep(0)
+        release.set()
+        return await stale, await fresh, await cache.get_or_compute("summary", "k", compute)
+
+    # The stale result reaches its caller but is neither joined nor stored
+    assert asyncio.run(scenario()) == (1, 2, 2)
+    assert calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    cache = ResultCache()
+    release = None
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"total": 42}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.create_task(cache.get_or_compute("summary", "k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_compute("summary", "k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # e.g. the leader's client disconnected
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results, await cache.get_or_compute("summary", "k", compute)
+
+    results, cached = asyncio.run(scenario())
+    assert results == [{"total": 42}] * 3
+    assert cached == {"total": 42}
+    assert calls == 1
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_firestore import FakeQuery
+
+
+class _CountAggregation:
+    def __init__(self, query: FakeQuery):
+        self.query = query
+
+    def get(self, retry=None, timeout=None):
+        total = sum(1 for _ in self.query._rows())
+        return [[SimpleNamespace(alias="total", value=total)]]
+
+
+def _expected_summary(db):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    timestamps = [data["timestamp"].replace(tzinfo=None) for _, data in db._stores["visits"].by_id]
+    return {
+        "total_visits": len(timestamps),
+        "today_visits": sum(ts >= today for ts in timestamps),
+        "week_visits": sum(ts >= today - timedelta(days=7) for ts in timestamps),
+        "month_visits": sum(ts >= today - timedelta(days=30) for ts in timestamps),
+        "pending_documents": db.document_count("document-queue"),
+        "total_staff": db.document_count("staff"),
+    }
+
+
+def _counts(summary):
+    return {key: value for key, value in summary.items() if key != "last_updated"}
+
+
+def test_count_documents_falls_back_to_streaming_without_aggregation(db, service):
+    assert not hasattr(db.collection("visits"), "count")
+    since = datetime.now() - timedelta(days=7)
+
+    total = asyncio.run(service.count_documents("visits"))
+    recent = asyncio.run(service.count_documents("visits", since=since))
+
+    assert total == db.document_count("visits")
+    assert recent == sum(
+        data["timestamp"].replace(tzinfo=None) >= since for _, data in db._stores["visits"].by_id
+    )
+
+
+def test_count_documents_uses_aggregation_when_available(monkeypatch, db, service):
+    monkeypatch.setattr(FakeQuery, "count", lambda self, alias=None: _CountAggregation(self), raising=False)
+
+    def no_stream(self, retry=None, timeout=None):
+        raise AssertionError("count() should not stream documents")
+
+    monkeypatch.setattr(FakeQuery, "stream", no_stream)
+
+    assert asyncio.run(service.count_documents("staff")) == db.document_count("staff")
+
+
+@pytest.mark.parametrize("aggregation", [False, True])
+def test_summary_counts_match_the_data(monkeypatch, db, service, aggregation):
+    if aggregation:
+        monkeypatch.setattr(FakeQuery, "count", lambda self, alias=None: _CountAggregation(self), raising=False)
+
+    summary = asyncio.run(service.get_analytics_summary())
+
+    assert _counts(summary) == _expected_summary(db)
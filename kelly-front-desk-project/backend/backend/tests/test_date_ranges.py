@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services.analytics_engine import to_naive_utc
+from app.services.batch import resolve_batch
+from app.models.analytics import BatchRequest
+
+EASTERN = timezone(timedelta(hours=-5))
+
+
+def test_aware_datetimes_are_converted_not_relabelled():
+    assert to_naive_utc(datetime(2026, 3, 1, 9, 0, tzinfo=EASTERN)) == datetime(2026, 3, 1, 14, 0)
+    assert to_naive_utc(datetime(2026, 3, 1, 9, 0)) == datetime(2026, 3, 1, 9, 0)
+    assert to_naive_utc(None) is None
+
+
+def test_custom_range_endpoint_applies_the_offset(service, api):
+    async def scenario():
+        async with api(service) as client:
+            response = await client.post("/api/v1/analytics/visits/custom-range", json={
+                "start_date": "2026-03-01T00:00:00-05:00",
+                "end_date": "2026-03-03T00:00:00-05:00",
+                "granularity": "day",
+            })
+            return response, service.cache._entries
+
+    response, entries = asyncio.run(scenario())
+    assert response.status_code == 200
+    (key,) = [key for key in entries if key[0] == "visits_range"]
+    arguments = dict(key[1])
+    assert arguments["start_date"] == datetime(2026, 3, 1, 5, 0)
+    assert arguments["end_date"] == datetime(2026, 3, 3, 5, 0)
+
+
+def test_batch_range_applies_the_offset(service):
+    request = BatchRequest(metrics=[{
+        "metric": "range",
+        "start_date": "2026-03-01T00:00:00-05:00",
+        "end_date": "2026-03-03T00:00:00-05:00",
+    }])
+
+    batch = asyncio.run(resolve_batch(service, request.metrics, max_days=400))
+
+    assert batch["plan"]["visits_read"]["start_date"] == "2026-03-01T05:00:00"
+    assert batch["plan"]["visits_read"]["end_date"] == "2026-03-03T05:00:00"
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timezone
+
+
+def _total_visits(response):
+    return response.json()["summary_cards"][0]["value"]
+
+
+def test_etag_and_body_change_together_after_a_write(db, service, api):
+    # Recompute the data version on every request instead of every 5 seconds
+    service.cache.ttls["data_version"] = 0
+
+    async def scenario():
+        async with api(service) as client:
+            first = await client.get("/api/v1/dashboard/widgets")
+            cached = await client.get("/api/v1/dashboard/widgets", headers={"If-None-Match": first.headers["ETag"]})
+
+            db.collection("visits").add({"timestamp": datetime.now(timezone.utc), "visitType": "Question"})
+
+            changed = await client.get("/api/v1/dashboard/widgets", headers={"If-None-Match": first.headers["ETag"]})
+            again = await client.get("/api/v1/dashboard/widgets", headers={"If-None-Match": changed.headers["ETag"]})
+            return first, cached, changed, again
+
+    first, cached, changed, again = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert cached.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert _total_visits(changed) == _total_visits(first) + 1
+    assert again.status_code == 304
+
+
+
+def test_chart_endpoints_answer_304_for_their_etag(service, api):
+    paths = [
+        "/api/v1/dashboard/chart/visits-trend",
+        "/api/v1/dashboard/chart/visit-types",
+        "/api/v1/dashboard/chart/visits-heatmap",
+    ]
+
+    async def scenario():
+        async with api(service) as client:
+            results = []
+            for path in paths:
+                first = await client.get(path)
+                again = await client.get(path, headers={"If-None-Match": first.headers.get("ETag", "")})
+                results.append((first, again))
+            return results
+
+    for first, again in asyncio.run(scenario()):
+        assert first.status_code == 200
+        assert first.headers.get("ETag")
+        assert first.json()["chart_data"] is not None
+        assert again.status_code == 304
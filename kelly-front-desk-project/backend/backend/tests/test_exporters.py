@@ -0,0 +1,48 @@
+import asyncio
+
+from openpyxl import load_workbook
+
+from app.services import exporters
+from app.services.report_jobs import render_report
+
+# Schema-less documents: "notes" first appears on the second page
+PAGES = [
+    [{"id": "v1", "visitor_name": "Ana"}, {"id": "v2", "visitor_name": "Luis"}],
+    [{"id": "v3", "visitor_name": "Eva", "notes": "late"}],
+]
+
+
+def _rows(output):
+    return [list(row) for row in load_workbook(output).active.iter_rows(values_only=True)]
+
+
+async def _pages():
+    for page in PAGES[1:]:
+        yield page
+
+
+def test_xlsx_export_header_covers_fields_of_later_pages():
+    output = asyncio.run(exporters.build_xlsx("visits", _pages(), first_page=PAGES[0]))
+
+    assert _rows(output) == [
+        ["id", "visitor_name", "notes"],
+        ["v1", "Ana", None],
+        ["v2", "Luis", None],
+        ["v3", "Eva", "late"],
+    ]
+
+
+def test_rendered_report_header_covers_fields_of_later_pages(tmp_path):
+    source_path = tmp_path / "job.pages"
+    with open(source_path, 'wb') as source:
+        for page in PAGES:
+            exporters.spool_page(source, page)
+
+    xlsx_path = tmp_path / "job.xlsx"
+    assert render_report("excel", "visits report", str(source_path), str(xlsx_path)) == 3
+    with open(xlsx_path, 'rb') as output:
+        assert _rows(output)[0] == ["id", "visitor_name", "notes"]
+
+    pdf_path = tmp_path / "job.pdf"
+    assert render_report("pdf", "visits report", str(source_path), str(pdf_path)) == 3
+    assert pdf_path.read_bytes().startswith(b"%PDF")
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.config import settings
+from app.services.firestore_service import FirestoreService
+from benchmarks.fake_firestore import FakeQuery
+
+# Simulated network round trip per query
+LATENCY = 0.25
+
+
+def test_parallel_summaries_overlap_their_reads(monkeypatch, db, api):
+    original_stream = FakeQuery.stream
+
+    def slow_stream(self, retry=None, timeout=None):
+        time.sleep(LATENCY)
+        yield from original_stream(self, retry, timeout)
+
+    monkeypatch.setattr(FakeQuery, "stream", slow_stream)
+    monkeypatch.setattr(settings, "firestore_io_workers", 64)
+    service = FirestoreService(db=db)
+    # Every request must do its own reads
+    service.cache = None
+
+    async def elapsed(requests: int) -> float:
+        async with api(service) as client:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.get("/api/v1/analytics/summary") for _ in range(requests)
+            ))
+            seconds = time.perf_counter() - started
+        assert [response.status_code for response in responses] == [200] * requests
+        return seconds
+
+    try:
+        single = asyncio.run(elapsed(1))
+        parallel = asyncio.run(elapsed(8))
+    finally:
+        service.close()
+
+    # The six counts of one summary already run concurrently
+    assert single < 3 * LATENCY
+    # Serialized, eight summaries would take eight times as long
+    assert parallel < 2.5 * single
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from app.services.local_store import LocalStore
+
+
+def test_synced_flag_is_answered_without_a_query(monkeypatch, tmp_path):
+    path = str(tmp_path / "mirror.sqlite3")
+    store = LocalStore(path)
+    store.upsert('visits', [{"id": "v1", "timestamp": datetime(2024, 5, 1), "visitType": "walk-in"}])
+    store.mark_synced('visits')
+
+    def no_connection():
+        raise AssertionError("is_synced must not touch SQLite")
+
+    monkeypatch.setattr(store, "_connect", no_connection)
+    assert store.is_synced('visits')
+    assert not store.is_synced('staff')
+    monkeypatch.undo()
+
+    # A mirror left by a previous run is still complete
+    assert LocalStore(path).is_synced('visits')
+
+    store.clear('visits')
+    assert not store.is_synced('visits')
+    assert not LocalStore(path).is_synced('visits')
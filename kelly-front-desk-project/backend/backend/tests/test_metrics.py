@@ -0,0 +1,48 @@
+import asyncio
+
+from app.config import settings
+from app.services import metrics
+from app.services.stats_broadcaster import StatsBroadcaster
+
+
+def _documents_read(collection: str, endpoint: str) -> float:
+    return metrics.FIRESTORE_DOCUMENTS._values.get((collection, endpoint), 0.0)
+
+
+def test_stream_producer_started_by_a_request_is_labelled_background():
+    endpoints = []
+
+    async def compute():
+        endpoints.append(metrics.current_endpoint())
+        return {}
+
+    broadcaster = StatsBroadcaster(compute, interval=60.0)
+
+    async def scenario():
+        # As if subscribe() ran while MetricsMiddleware serves the stream
+        token = metrics._current_scope.set({"path": "/api/v1/analytics/stream"})
+        try:
+            queue = broadcaster.subscribe()
+            await queue.get()
+        finally:
+            metrics._current_scope.reset(token)
+            await broadcaster.close()
+
+    asyncio.run(scenario())
+    assert endpoints == ["background"]
+
+
+def test_report_job_reads_are_labelled_background(monkeypatch, service, api):
+    monkeypatch.setattr(settings, "report_generate_wait", 0)
+    before = _documents_read("staff", "background")
+
+    async def scenario():
+        async with api(service) as client:
+            accepted = await client.post("/api/v1/reports/generate",
+                                         json={"report_type": "staff", "format": "excel"},
+                                         headers={"Prefer": "respond-async"})
+            await client.get(f"/api/v1/reports/jobs/{accepted.json()['job_id']}/wait", params={"timeout": 60})
+
+    asyncio.run(scenario())
+    assert _documents_read("staff", "background") > before
+    assert _documents_read("staff", "/api/v1/reports/generate") == 0
@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.pagination import InvalidPageToken, decode_page_token, encode_page_token
+
+
+def _all_pages(service, collection, **filters):
+    async def collect():
+        pages, token = [], None
+        while True:
+            page = await service.get_collection_page(collection, page_token=token, **filters)
+            pages.append(page)
+            token = page["next_page_token"]
+            if token is None:
+                return pages
+    return asyncio.run(collect())
+
+
+def test_page_token_round_trips_cursor_values():
+    cursor = {"timestamp": datetime(2026, 3, 1, 9, 30, 15, 120000), "__name__": "visit00000042"}
+
+    token = encode_page_token("visits", cursor)
+
+    assert decode_page_token(token, "visits") == cursor
+
+
+@pytest.mark.parametrize("token", [
+    encode_page_token("staff", {"__name__": "staff00001"}),
+    "not-a-token",
+    base64.urlsafe_b64encode(b'{"c": "visits"}').decode().rstrip("="),
+    base64.urlsafe_b64encode(b"[1, 2]").decode().rstrip("="),
+])
+def test_tampered_or_foreign_tokens_are_rejected(token):
+    with pytest.raises(InvalidPageToken):
+        decode_page_token(token, "visits")
+
+
+def test_pages_cover_the_collection_once_in_order(monkeypatch, db, service):
+    monkeypatch.setattr("app.config.settings.page_size_default", 70)
+
+    pages = _all_pages(service, "visits")
+
+    ids = [record["id"] for page in pages for record in page["data"]]
+    assert ids == sorted(data_id for data_id, _ in db._stores["visits"].by_id)
+    assert [page["has_more"] for page in pages] == [True] * (len(pages) - 1) + [False]
+    assert all(page["total_records"] == len(ids) for page in pages)
+
+
+def test_date_filtered_pages_follow_timestamp_order(monkeypatch, db, service):
+    monkeypatch.setattr("app.config.settings.page_size_default", 25)
+    end = datetime.now()
+    start = end - timedelta(days=20)
+
+    pages = _all_pages(service, "visits", start_date=start, end_date=end)
+
+    records = [record for page in pages for record in page["data"]]
+    expected = sorted(
+        (data["timestamp"].replace(tzinfo=None), doc_id) for doc_id, data in db._stores["visits"].by_id
+        if start <= data["timestamp"].replace(tzinfo=None) <= end
+    )
+    assert [(record["timestamp"], record["id"]) for record in records] == expected
+
+
+def test_token_from_other_filters_is_rejected(service):
+    unfiltered = asyncio.run(service.get_collection_page("visits", page_size=10))
+
+    with pytest.raises(InvalidPageToken):
+        asyncio.run(service.get_collection_page(
+            "visits", page_size=10, page_token=unfiltered["next_page_token"],
+            start_date=datetime.now() - timedelta(days=7)
+        ))
+
+
+def test_endpoints_answer_400_for_a_tampered_token(service, api):
+    token = encode_page_token("visits", {"__name__": "visit00000010"})
+    payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    payload["c"] = "staff"
+    tampered = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    async def scenario():
+        async with api(service) as client:
+            return await asyncio.gather(
+                client.post("/api/v1/reports/export",
+                            json={"collection": "visits", "format": "json", "page_token": tampered}),
+                client.post("/api/v1/reports/generate",
+                            json={"report_type": "visits", "format": "json", "page_token": tampered}),
+            )
+
+    assert [response.status_code for response in asyncio.run(scenario())] == [400, 400]
+
+
+def test_unpaged_json_returns_every_record(db, service, api):
+    async def scenario():
+        async with api(service) as client:
+            return await asyncio.gather(
+                client.post("/api/v1/reports/export", json={"collection": "visits", "format": "json"}),
+                client.post("/api/v1/reports/generate", json={"report_type": "visits", "format": "json"}),
+            )
+
+    for response in asyncio.run(scenario()):
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total_records"] == len(body["data"]) == db.document_count("visits")
+        assert body["has_more"] is False
+
+
+def test_paged_json_export_links_to_the_next_page(db, service, api):
+    async def scenario():
+        async with api(service) as client:
+            first = await client.post("/api/v1/reports/export",
+                                      json={"collection": "staff", "format": "json", "page_size": 3})
+            second = await client.post("/api/v1/reports/export", json={
+                "collection": "staff", "format": "json", "page_size": 3,
+                "page_token": first.json()["next_page_token"],
+            })
+            return first.json(), second.json()
+
+    first, second = asyncio.run(scenario())
+    assert first["has_more"] is True
+    assert len(first["data"]) == 3
+    assert first["data"][-1]["id"] < second["data"][0]["id"]
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.exporters import XLSX_MEDIA_TYPE
+from app.services.report_jobs import DONE, ReportJob, ReportJobManager
+
+
+def test_generate_returns_the_file_without_opting_in_to_async(monkeypatch, service, api):
+    # Even a render slower than the wait must not turn into a JSON body
+    monkeypatch.setattr(settings, "report_generate_wait", 0)
+
+    async def scenario():
+        async with api(service) as client:
+            return await client.post("/api/v1/reports/generate",
+                                     json={"report_type": "staff", "format": "excel"})
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == XLSX_MEDIA_TYPE
+    assert response.content[:2] == b"PK"
+
+
+def test_generate_answers_202_when_the_client_prefers_async(monkeypatch, service, api):
+    monkeypatch.setattr(settings, "report_generate_wait", 0)
+
+    async def scenario():
+        async with api(service) as client:
+            accepted = await client.post("/api/v1/reports/generate",
+                                         json={"report_type": "staff", "format": "excel"},
+                                         headers={"Prefer": "respond-async"})
+            job_id = accepted.json()["job_id"]
+            await client.get(f"/api/v1/reports/jobs/{job_id}/wait", params={"timeout": 60})
+            download = await client.get(f"/api/v1/reports/jobs/{job_id}/download")
+            return accepted, download
+
+    accepted, download = asyncio.run(scenario())
+    assert accepted.status_code == 202
+    assert download.status_code == 200
+    assert download.content[:2] == b"PK"
+
+
+def test_each_manager_renders_into_its_own_directory(tmp_path, service):
+    shared = tmp_path / "artifacts"
+
+    async def scenario():
+        first = ReportJobManager(service, artifact_dir=str(shared))
+        other_process_file = os.path.join(first.artifact_dir, "in-flight.pages")
+        open(other_process_file, "wb").close()
+        second = ReportJobManager(service, artifact_dir=str(shared))
+        survived = os.path.exists(other_process_file)
+        await second.close()
+        remaining = sorted(os.listdir(shared))
+        await first.close()
+        return first.artifact_dir, second.artifact_dir, survived, remaining
+
+    first_dir, second_dir, survived, remaining = asyncio.run(scenario())
+    assert first_dir != second_dir
+    assert os.path.dirname(first_dir) == str(shared)
+    assert survived
+    assert remaining == [os.path.basename(first_dir)]
+    assert os.listdir(shared) == []
+
+
+def _finished_job(manager, name, age):
+    job = ReportJob(name, "staff", "excel", "staff", {})
+    job.artifact_path = os.path.join(manager.artifact_dir, f"{name}.xlsx")
+    with open(job.artifact_path, "wb") as artifact:
+        artifact.write(b"PK")
+    job.status = DONE
+    job.finished_monotonic = time.monotonic() - age
+    job.done.set()
+    manager._jobs[job.id] = job
+    manager._by_key[job.key] = job
+    return job
+
+
+def test_finished_jobs_past_their_ttl_are_evicted(tmp_path, service):
+    manager = ReportJobManager(service, artifact_dir=str(tmp_path), ttl=60)
+    expired = _finished_job(manager, "expired", age=61)
+    fresh = _finished_job(manager, "fresh", age=30)
+
+    status = manager.status()
+
+    assert status["artifacts"] == 1
+    assert not os.path.exists(expired.artifact_path)
+    assert os.path.exists(fresh.artifact_path)
+    with pytest.raises(KeyError):
+        manager.get(expired.id)
+    assert manager.get(fresh.id) is fresh
+    asyncio.run(manager.close())
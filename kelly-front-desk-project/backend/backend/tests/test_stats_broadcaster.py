@@ -0,0 +1,79 @@
+import asyncio
+
+from app.services.stats_broadcaster import StatsBroadcaster
+
+
+class _ChangeFeed:
+    """Stand-in for Firestore: a counter bumped by writes, read by compute()"""
+
+    def __init__(self):
+        self.writes = 0
+        self.computations = 0
+
+    async def compute(self):
+        self.computations += 1
+        return {"total_visits": self.writes}
+
+
+def test_one_computation_is_fanned_out_to_every_client():
+    feed = _ChangeFeed()
+    broadcaster = StatsBroadcaster(feed.compute, interval=60.0)
+
+    async def scenario():
+        queues = [broadcaster.subscribe() for _ in range(10)]
+        payloads = await asyncio.gather(*(queue.get() for queue in queues))
+        await broadcaster.close()
+        return payloads
+
+    payloads = asyncio.run(scenario())
+    assert payloads == [{"total_visits": 0}] * 10
+    assert feed.computations == 1
+
+
+def test_notify_recomputes_before_the_next_tick():
+    feed = _ChangeFeed()
+    broadcaster = StatsBroadcaster(feed.compute, interval=60.0)
+
+    async def scenario():
+        queue = broadcaster.subscribe()
+        assert await queue.get() == {"total_visits": 0}
+        feed.writes += 1
+        broadcaster.notify()
+        payload = await asyncio.wait_for(queue.get(), timeout=1.0)
+        await broadcaster.close()
+        return payload
+
+    assert asyncio.run(scenario()) == {"total_visits": 1}
+
+
+def test_slow_clients_only_keep_the_newest_payloads():
+    feed = _ChangeFeed()
+    broadcaster = StatsBroadcaster(feed.compute, interval=0.001, queue_size=2)
+
+    async def scenario():
+        slow = broadcaster.subscribe()
+        while feed.computations < 10:
+            await asyncio.sleep(0.005)
+        await broadcaster.close()
+        return [slow.get_nowait() for _ in range(slow.qsize())]
+
+    backlog = asyncio.run(scenario())
+    assert len(backlog) == 2
+    assert broadcaster.dropped >= 8
+
+
+def test_last_client_leaving_stops_the_producer():
+    feed = _ChangeFeed()
+    broadcaster = StatsBroadcaster(feed.compute, interval=0.001)
+
+    async def scenario():
+        queue = broadcaster.subscribe()
+        await queue.get()
+        broadcaster.unsubscribe(queue)
+        computations = feed.computations
+        await asyncio.sleep(0.02)
+        return computations
+
+    computations = asyncio.run(scenario())
+    assert feed.computations == computations
+    assert broadcaster.client_count == 0
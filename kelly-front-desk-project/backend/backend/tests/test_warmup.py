@@ -0,0 +1,32 @@
+import asyncio
+
+from app.services.warmup import warm_up
+
+
+def test_warm_up_fills_only_long_lived_entries(service):
+    steps = asyncio.run(warm_up(service, days=30, min_ttl=60))
+
+    assert set(steps) == {"data_version", "visits_trend", "visit_types", "heatmap", "chart_templates"}
+    assert not any("error" in step for step in steps.values())
+    warmed = {metric for metric, _ in service.cache._entries}
+    assert {"visits_trend", "visit_types", "heatmap"} <= warmed
+    assert not warmed & {"summary", "visits_overview"}
+
+
+def test_warmed_entries_survive_the_first_data_version_request(service):
+    async def scenario():
+        await warm_up(service, days=30, min_ttl=60)
+        service.cache.invalidate("data_version")
+        await service.get_data_version()
+        await service.get_daily_visits_trend(days=30)
+
+    asyncio.run(scenario())
+    assert service.cache.stats()["metrics"]["visits_trend"]["hits"] == 1
+
+
+def test_nothing_is_read_when_the_cache_is_off(service):
+    service.cache = None
+
+    steps = asyncio.run(warm_up(service, days=30))
+
+    assert set(steps) == {"chart_templates"}